@@ -6,12 +6,14 @@ from models.schemas import (
     TimeSlot
 )
 from services.availability_service import AvailabilityService
+from services.working_hours_service import WorkingHoursService
 from storage.calendar_store import CalendarStore
 from typing import List
 
 app = FastAPI()
 calendar_store = CalendarStore()
-availability_service = AvailabilityService(calendar_store)
+working_hours_service = WorkingHoursService()
+availability_service = AvailabilityService(calendar_store, working_hours_service)
 
 @app.post("/check-availability")
 async def check_availability(request: AvailabilityRequest) -> bool:
@@ -1,19 +1,32 @@
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Tuple
+import heapq
 import json
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 import pytz
+from services.availability_service import AvailabilityService
 
 # Load environment variables from .env file
 env_path = Path(__file__).resolve().parents[2] / '.env'
 load_dotenv(dotenv_path=env_path)
 
 class AIAvailabilityService:
-    def __init__(self, calendar_store, agent_data_file: str = "data/mock/agents_clients.json"):
+    def __init__(self, 
+                 calendar_store, 
+                 agent_data_file: str = "data/mock/agents_clients.json", 
+                 working_hours=None,
+                 availability_service=None,
+                 max_candidate_blocks: int = 10,
+                 prompt_token_budget: int = 1000):
         self.calendar_store = calendar_store
+        self.working_hours = working_hours
+        # Free blocks are enumerated by the shared availability service so both paths agree
+        self.availability_service = availability_service or AvailabilityService(calendar_store, working_hours)
+        self.max_candidate_blocks = max_candidate_blocks
+        self.prompt_token_budget = prompt_token_budget
         
         # Get API key from environment variables
         api_key = os.getenv("OPENAI_API_KEY")
@@ -36,6 +49,16 @@ class AIAvailabilityService:
             return pytz.UTC.localize(dt)
         return dt.astimezone(pytz.UTC)
 
+    def _to_agent_time(self, dt: datetime, agent_id: str) -> datetime:
+        """Convert a UTC datetime to the agent's local timezone for display"""
+        if not self.working_hours:
+            return dt
+        return dt.astimezone(self.working_hours.get_timezone(agent_id))
+
+    def _describe_block_start(self, block: Dict, agent_id: str) -> str:
+        """Human-readable block start used both in the prompt and to match the AI's answer"""
+        return self._to_agent_time(block['start'], agent_id).strftime('%A %I:%M %p')
+
     def _get_agent_info(self, agent_id: str) -> Dict:
         """Get agent information including their clients and specialty"""
         for agent in self.agent_data['agents']:
@@ -75,23 +98,44 @@ class AIAvailabilityService:
         
         return patterns
 
+    def _estimate_tokens(self, text: str) -> int:
+        """Cheap local token estimate (roughly 4 characters per token for English text)"""
+        return len(text) // 4 + 1
+
+    def _score_block(self, block: Dict, agent_id: str) -> float:
+        """Cheap local score used to pre-filter blocks before they reach the prompt"""
+        score = float(block['duration_minutes'])
+        # Mornings are usually better for focused work
+        if self._to_agent_time(block['start'], agent_id).hour < 12:
+            score *= 1.25
+        return score
+
+    def _select_candidate_blocks(self, available_blocks: List[Dict], agent_id: str) -> List[Dict]:
+        """Keep only the top candidates by local score, best first"""
+        return heapq.nlargest(
+            self.max_candidate_blocks,
+            available_blocks,
+            key=lambda block: self._score_block(block, agent_id)
+        )
+
     def _format_work_block_prompt(self, 
                                 available_blocks: List[Dict], 
                                 patterns: Dict,
-                                agent_info: Dict) -> str:
-        """Format the prompt for OpenAI to analyze work blocks"""
-        blocks_text = []
-        for block in available_blocks:
-            duration = (block['end'] - block['start']).total_seconds() / 3600  # hours
-            blocks_text.append(
-                f"- {block['start'].strftime('%A %I:%M %p')} to {block['end'].strftime('%I:%M %p')} "
-                f"(Duration: {duration:.1f} hours)"
-            )
+                                agent_info: Dict) -> Tuple[str, List[Dict]]:
+        """
+        Format the prompt for OpenAI to analyze work blocks, given blocks in order of preference.
+        Blocks are added only while the estimated prompt size stays within the token budget, then
+        listed chronologically. Returns the prompt and the blocks that made it into the prompt.
+        """
+        if patterns['meeting_times']:
+            meeting_hours = f"{min(patterns['meeting_times'])}:00 - {max(patterns['meeting_times'])}:00"
+        else:
+            meeting_hours = "no meetings scheduled"
         
         active_clients = sum(1 for client in agent_info['clients'] if client['status'] == 'active')
         follow_up_clients = sum(1 for client in agent_info['clients'] if client['status'] == 'follow_up')
         
-        prompt = f"""
+        header = f"""
 As an AI assistant for a real estate agent, analyze these available work blocks and recommend the best one:
 
 Agent Profile:
@@ -100,10 +144,10 @@ Agent Profile:
 - Clients Needing Follow-up: {follow_up_clients}
 
 Available Time Blocks:
-{chr(10).join(blocks_text)}
-
+"""
+        footer = f"""
 Calendar Patterns:
-- Most meetings occur between: {min(patterns['meeting_times'])}:00 - {max(patterns['meeting_times'])}:00
+- Most meetings occur between: {meeting_hours}
 - Average meeting duration: {patterns['avg_meeting_duration']:.0f} minutes
 - Client meetings this week: {patterns['client_meetings']}
 - Team meetings this week: {patterns['team_meetings']}
@@ -117,83 +161,141 @@ Consider:
 
 Which block would be most productive for focused work and why?
 """
-        return prompt
+        tokens_used = self._estimate_tokens(header) + self._estimate_tokens(footer)
+        block_lines = []
+        for block in available_blocks:
+            duration = (block['end'] - block['start']).total_seconds() / 3600  # hours
+            block_end = self._to_agent_time(block['end'], agent_info['agent_id'])
+            line = (
+                f"- {self._describe_block_start(block, agent_info['agent_id'])} to {block_end.strftime('%I:%M %p')} "
+                f"(Duration: {duration:.1f} hours)"
+            )
+            line_tokens = self._estimate_tokens(line)
+            # Always keep at least one block so the model has something to choose from
+            if block_lines and tokens_used + line_tokens > self.prompt_token_budget:
+                break
+            block_lines.append((block, line))
+            tokens_used += line_tokens
 
-    def find_best_work_block(self, 
-                           agent_id: str, 
-                           min_duration_minutes: int = 60) -> Optional[Dict]:
+        block_lines.sort(key=lambda block_line: block_line[0]['start'])
+        prompt = header + chr(10).join(line for _, line in block_lines) + chr(10) + footer
+        return prompt, [block for block, _ in block_lines]
+
+    def prepare_work_block_analysis(self, 
+                                     agent_id: str, 
+                                     min_duration_minutes: int) -> Tuple[List[Dict], Optional[str]]:
         """
-        Find the best work block using AI analysis of calendar patterns and agent context
+        Find candidate work blocks for the next 7 days and build the prompt to rank them.
+        Returns an empty candidate list and no prompt if there are no suitable blocks.
         """
         # Get agent information
         agent_info = self._get_agent_info(agent_id)
         
         # Get calendar events for the next 7 days
-        start_time = self._ensure_timezone_aware(datetime.now())
+        start_time = self._ensure_timezone_aware(datetime.now(pytz.UTC))
         end_time = self._ensure_timezone_aware(start_time + timedelta(days=7))
         events = self.calendar_store.get_events(agent_id, start_time, end_time)
         
         # Analyze calendar patterns
         patterns = self._analyze_calendar_patterns(events, agent_info)
         
-        # Find available blocks
-        available_blocks = []
-        current_time = start_time
-        
-        # Sort events by start time
-        events.sort(key=lambda x: x['start'])
-        
-        for event in events:
-            # Ensure event times are timezone-aware
-            event_start = self._ensure_timezone_aware(event['start'])
-            event_end = self._ensure_timezone_aware(event['end'])
-            
-            gap = event_start - current_time
-            gap_minutes = gap.total_seconds() / 60
-            
-            if gap_minutes >= min_duration_minutes:
-                available_blocks.append({
-                    'start': current_time,
-                    'end': event_start,
-                    'duration_minutes': int(gap_minutes)
-                })
-            current_time = event_end
+        # Find available blocks, restricted to the agent's working hours
+        available_blocks = [
+            {
+                'start': block_start,
+                'end': block_end,
+                'duration_minutes': int((block_end - block_start).total_seconds() / 60)
+            }
+            for block_start, block_end in self.availability_service.enumerate_free_blocks(
+                agent_id, start_time, end_time, min_duration_minutes
+            )
+        ]
         
         if not available_blocks:
-            return None
-            
-        # Use OpenAI to analyze and choose the best block
-        prompt = self._format_work_block_prompt(available_blocks, patterns, agent_info)
+            return [], None
         
-        response = self.openai_client.chat.completions.create(
+        candidate_blocks = self._select_candidate_blocks(available_blocks, agent_id)
+        prompt, prompt_blocks = self._format_work_block_prompt(candidate_blocks, patterns, agent_info)
+        # Only the blocks the model actually sees can be recommended
+        return prompt_blocks, prompt
+
+    def _create_completion(self, prompt: str, stream: bool = False):
+        """Send the work block prompt to OpenAI"""
+        return self.openai_client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an AI assistant helping real estate agents optimize their work schedule."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=500
+            max_tokens=500,
+            stream=stream
         )
-        
-        # Parse the response to identify the recommended block
-        response_text = response.choices[0].message.content.lower()
-        
-        # Find the block that best matches the AI's recommendation
-        for block in available_blocks:
-            block_desc = f"{block['start'].strftime('%A %I:%M %p')}".lower()
-            if block_desc in response_text:
+
+    def _match_recommended_block(self, 
+                                 candidate_blocks: List[Dict], 
+                                 response_text: str,
+                                 agent_id: str) -> Dict:
+        """Find the block that best matches the AI's recommendation"""
+        for block in candidate_blocks:
+            block_desc = self._describe_block_start(block, agent_id).lower()
+            if block_desc in response_text.lower():
                 return {
                     'start': block['start'],
                     'end': block['end'],
                     'duration_minutes': block['duration_minutes'],
-                    'ai_reasoning': response.choices[0].message.content
+                    'ai_reasoning': response_text
                 }
         
         # If no specific block was identified in the response, return the longest available block
-        longest_block = max(available_blocks, key=lambda x: x['duration_minutes'])
+        longest_block = max(candidate_blocks, key=lambda x: x['duration_minutes'])
         return {
             'start': longest_block['start'],
             'end': longest_block['end'],
             'duration_minutes': longest_block['duration_minutes'],
             'ai_reasoning': "Selected the longest available time block for maximum productivity."
-        } 
\ No newline at end of file
+        }
+
+    def find_best_work_block(self, 
+                           agent_id: str, 
+                           min_duration_minutes: int = 60) -> Optional[Dict]:
+        """
+        Find the best work block using AI analysis of calendar patterns and agent context
+        """
+        candidate_blocks, prompt = self.prepare_work_block_analysis(agent_id, min_duration_minutes)
+        if not candidate_blocks:
+            return None
+        
+        # Use OpenAI to analyze and choose the best block
+        response = self._create_completion(prompt)
+        return self._match_recommended_block(
+            candidate_blocks, response.choices[0].message.content, agent_id
+        )
+
+    def stream_best_work_block(self, 
+                               candidate_blocks: List[Dict], 
+                               prompt: str,
+                               agent_id: str) -> Iterator[Dict]:
+        """
+        Stream the AI analysis for prepared candidate blocks.
+        Yields {'type': 'delta', 'content': ...} as text arrives, then a final
+        {'type': 'result', 'block': ...} with the recommended block, or
+        {'type': 'error', 'detail': ...} if the upstream request fails.
+        """
+        response_parts = []
+        try:
+            for chunk in self._create_completion(prompt, stream=True):
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    response_parts.append(content)
+                    yield {'type': 'delta', 'content': content}
+        except Exception as e:
+            yield {'type': 'error', 'detail': str(e)}
+            return
+        
+        yield {
+            'type': 'result',
+            'block': self._match_recommended_block(candidate_blocks, ''.join(response_parts), agent_id)
+        }
@@ -1,12 +1,20 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, time, timedelta
+from typing import Callable, Iterator, List, Optional
+import heapq
 import pytz
 from storage.calendar_store import CalendarStore
 from models.schemas import TimeRange, TimeSlot
+from services.working_hours_service import WorkingHoursService
+from utils.intervals import Interval, find_gaps, intersect_intervals
+
+def score_by_duration(start: datetime, end: datetime) -> float:
+    """Default work block score: longer blocks are better"""
+    return (end - start).total_seconds() / 60
 
 class AvailabilityService:
-    def __init__(self, calendar_store: CalendarStore):
+    def __init__(self, calendar_store: CalendarStore, working_hours: Optional[WorkingHoursService] = None):
         self.calendar_store = calendar_store
+        self.working_hours = working_hours
         self.timezone = pytz.UTC
 
     def _make_timezone_aware(self, dt: datetime) -> datetime:
@@ -15,6 +23,12 @@ class AvailabilityService:
             return self.timezone.localize(dt)
         return dt.astimezone(self.timezone)
 
+    def _get_search_windows(self, agent_id: str, start_time: datetime, end_time: datetime):
+        """Get the parts of [start_time, end_time) that fall inside the agent's working hours"""
+        if not self.working_hours:
+            return [(start_time, end_time)]
+        return self.working_hours.get_working_intervals(agent_id, start_time, end_time)
+
     def check_availability(self, agent_id: str, check_time: datetime, duration_minutes: int) -> bool:
         """
         Check if an agent is available at a specific time for a given duration
@@ -26,6 +40,14 @@ class AvailabilityService:
         start_time = check_time
         end_time = check_time + timedelta(minutes=duration_minutes)
         
+        # Outside of working hours the agent is never available
+        if self.working_hours and not self.working_hours.is_within_working_hours(agent_id, start_time, end_time):
+            return False
+        
+        return self._is_free(agent_id, start_time, end_time)
+
+    def _is_free(self, agent_id: str, start_time: datetime, end_time: datetime) -> bool:
+        """Check for conflicting events only, without consulting working hours"""
         events = self.calendar_store.get_events(agent_id, start_time, end_time)
         
         # If there are any events during this time, the agent is not available
@@ -50,40 +72,84 @@ class AvailabilityService:
             
             slot_duration = timedelta(minutes=duration_minutes)
             
-            while current_time + slot_duration <= end_time and len(available_slots) < num_slots:
-                if self.check_availability(agent_id, current_time, duration_minutes):
-                    slot = TimeSlot(
-                        start=current_time,
-                        end=current_time + slot_duration,
-                        description=f"Available {duration_minutes} minute slot"
-                    )
-                    available_slots.append(slot)
-                
-                # Move to next potential slot (try every 30 minutes)
-                current_time += timedelta(minutes=30)
+            # Only walk candidates inside the agent's working hours, so they need no mask check
+            for window_start, window_end in self._get_search_windows(agent_id, current_time, end_time):
+                current_time = window_start
+                while current_time + slot_duration <= window_end and len(available_slots) < num_slots:
+                    if self._is_free(agent_id, current_time, current_time + slot_duration):
+                        slot = TimeSlot(
+                            start=current_time,
+                            end=current_time + slot_duration,
+                            description=f"Available {duration_minutes} minute slot"
+                        )
+                        available_slots.append(slot)
+                    
+                    # Move to next potential slot (try every 30 minutes)
+                    current_time += timedelta(minutes=30)
         
         return available_slots
 
-    def find_best_work_block(self, agent_id: str, min_duration_minutes: int) -> Optional[TimeSlot]:
-        # Look for blocks in the next 7 days
-        start_time = self._make_timezone_aware(datetime.now())
-        end_time = start_time + timedelta(days=7)
-        events = self.calendar_store.get_events(agent_id, start_time, end_time)
+    def _align_to_step(self, agent_id: str, dt: datetime, step_minutes: int) -> datetime:
+        """Round a datetime up to the next multiple of step_minutes after the agent's local midnight"""
+        tz = self.working_hours.get_timezone(agent_id) if self.working_hours else self.timezone
+        local = dt.astimezone(tz)
+        # Measure wall-clock time since local midnight so the grid also holds across DST changes
+        elapsed = local.replace(tzinfo=None) - datetime.combine(local.date(), time.min)
+        remainder = elapsed % timedelta(minutes=step_minutes)
+        if not remainder:
+            return dt
+        return dt + (timedelta(minutes=step_minutes) - remainder)
+
+    def enumerate_free_blocks(
+        self,
+        agent_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        min_duration_minutes: int,
+        step_minutes: int = 15
+    ) -> Iterator[Interval]:
+        """
+        Yield free blocks of at least min_duration_minutes between start_time and end_time.
+        Busy events are merged first, so overlapping and nested events never produce
+        phantom gaps, and the open-ended gap after the last event is included.
+        Block starts are aligned up to the step grid.
+        """
+        start_time = self._make_timezone_aware(start_time)
+        end_time = self._make_timezone_aware(end_time)
+        min_duration = timedelta(minutes=min_duration_minutes)
         
-        # Sort events by start time
-        events.sort(key=lambda x: x['start'])
+        events = self.calendar_store.get_events(agent_id, start_time, end_time)
+        busy = [(event['start'], event['end']) for event in events]
+        windows = self._get_search_windows(agent_id, start_time, end_time)
         
-        best_block = None
-        max_duration = timedelta(minutes=0)
+        for block_start, block_end in intersect_intervals(list(find_gaps(busy, start_time, end_time)), windows):
+            block_start = self._align_to_step(agent_id, block_start, step_minutes)
+            if block_end - block_start >= min_duration:
+                yield (block_start, block_end)
+
+    def find_best_work_blocks(
+        self,
+        agent_id: str,
+        min_duration_minutes: int,
+        k: int = 3,
+        horizon_days: int = 7,
+        step_minutes: int = 15,
+        start_time: Optional[datetime] = None,
+        score: Callable[[datetime, datetime], float] = score_by_duration
+    ) -> List[TimeSlot]:
+        """
+        Find the k best work blocks in the horizon, ranked by score (highest first).
+        Uses a bounded heap over the enumerated gaps, so ranking is O(n log k).
+        """
+        start_time = self._make_timezone_aware(start_time or datetime.now(pytz.UTC))
+        end_time = start_time + timedelta(days=horizon_days)
         
-        # Check gaps between events
-        current_time = start_time
-        for event in events:
-            gap = event['start'] - current_time
-            if gap >= timedelta(minutes=min_duration_minutes):
-                if gap > max_duration:
-                    max_duration = gap
-                    best_block = TimeSlot(start=current_time, end=event['start'])
-            current_time = event['end']
+        blocks = self.enumerate_free_blocks(agent_id, start_time, end_time, min_duration_minutes, step_minutes)
+        best_blocks = heapq.nlargest(k, blocks, key=lambda block: score(*block))
         
-        return best_block 
\ No newline at end of file
+        return [TimeSlot(start=block_start, end=block_end) for block_start, block_end in best_blocks]
+
+    def find_best_work_block(self, agent_id: str, min_duration_minutes: int) -> Optional[TimeSlot]:
+        # Look for the single best block in the next 7 days
+        blocks = self.find_best_work_blocks(agent_id, min_duration_minutes, k=1)
+        return blocks[0] if blocks else None
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+from storage.calendar_store import CalendarStore
+
+def serialize_event(event: Dict) -> Dict:
+    """Format a stored event for the API"""
+    return {
+        'uid': event['uid'],
+        'summary': event['summary'],
+        'description': event['description'],
+        'start': event['start'].isoformat(),
+        'end': event['end'].isoformat()
+    }
+
+class ChangeFeedService:
+    """
+    Versioned calendar deltas so clients only fetch what changed.
+
+    Clients remember the (epoch, version) of their last sync and ask for the changes
+    since then. If the change log no longer covers that version, or the store was
+    restarted under a new epoch, the full event list is returned with reset=True.
+    Long-poll and SSE subscribers wait on a per-agent asyncio.Event that the store's
+    change listener sets.
+    """
+
+    def __init__(self, calendar_store: CalendarStore):
+        self.calendar_store = calendar_store
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        calendar_store.add_listener(self._on_change)
+
+    def _on_change(self, agent_id: str, changed_ranges: List[Tuple[datetime, datetime]]) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        # Changes may be made from a worker thread, so wake waiters on the event loop
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._wake(agent_id)
+        else:
+            self._loop.call_soon_threadsafe(self._wake, agent_id)
+
+    def _wake(self, agent_id: str) -> None:
+        waiter = self._waiters.pop(agent_id, None)
+        if waiter:
+            waiter.set()
+
+    def get_delta(self, agent_id: str, since: Optional[int] = None, epoch: Optional[str] = None) -> Dict:
+        """Get the changes since a version, or the full event list if they can't be served"""
+        version = self.calendar_store.get_version(agent_id)
+        changes = None
+        if since is not None and epoch in (None, self.calendar_store.epoch):
+            changes = self.calendar_store.get_changes(agent_id, since)
+
+        delta = {
+            'agent_id': agent_id,
+            'epoch': self.calendar_store.epoch,
+            'version': version,
+            'reset': changes is None
+        }
+        if changes is None:
+            delta['events'] = [serialize_event(event) for event in self.calendar_store.get_all_events(agent_id)]
+        else:
+            delta['changes'] = [
+                {
+                    'version': change['version'],
+                    'type': change['type'],
+                    'uid': change['uid'],
+                    'event': serialize_event(change['event']) if change['event'] else None
+                }
+                for change in changes
+            ]
+        return delta
+
+    async def wait_for_change(self, agent_id: str, since: int, timeout: float) -> bool:
+        """Wait until the agent's version moves past `since`; returns False on timeout"""
+        self._loop = asyncio.get_running_loop()
+        deadline = self._loop.time() + timeout
+        while self.calendar_store.get_version(agent_id) == since:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return False
+            waiter = self._waiters.setdefault(agent_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(waiter.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
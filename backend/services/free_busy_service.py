@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import hashlib
+import pytz
+from storage.calendar_store import PRODID, CalendarStore
+from utils.ics_writer import serialize_free_busy
+from utils.intervals import Interval, merge_intervals
+
+class FreeBusyService:
+    """
+    Precomputed free/busy feeds per agent over a rolling horizon.
+
+    Busy time is kept in per-day UTC buckets of merged intervals. When the calendar
+    store reports changed events only the affected day buckets are recomputed, and
+    when the horizon rolls forward only the new days are computed. Serialized JSON
+    and VFREEBUSY payloads are cached per feed and identified by an ETag, so repeat
+    polls don't touch the calendar data at all.
+    """
+
+    def __init__(self, calendar_store: CalendarStore, horizon_days: int = 30):
+        self.calendar_store = calendar_store
+        self.horizon_days = horizon_days
+        self._feeds: Dict[str, Dict] = {}
+        calendar_store.add_listener(self.invalidate)
+
+    def _today(self) -> date:
+        return datetime.now(pytz.UTC).date()
+
+    def _day_start(self, day: date) -> datetime:
+        return pytz.UTC.localize(datetime(day.year, day.month, day.day))
+
+    def _days_touched(self, start: datetime, end: datetime) -> Iterable[date]:
+        """UTC days overlapped by [start, end)"""
+        day = start.astimezone(pytz.UTC).date()
+        while self._day_start(day) < end:
+            yield day
+            day += timedelta(days=1)
+
+    def _compute_buckets(self, agent_id: str, days: List[date]) -> Dict[date, List[Interval]]:
+        """Compute merged busy intervals for each of the given UTC days"""
+        if not days:
+            return {}
+
+        buckets: Dict[date, List[Interval]] = {day: [] for day in days}
+        events = self.calendar_store.get_events(
+            agent_id, self._day_start(min(days)), self._day_start(max(days) + timedelta(days=1))
+        )
+        for event in events:
+            for day in self._days_touched(event['start'], event['end']):
+                if day in buckets:
+                    day_start = self._day_start(day)
+                    buckets[day].append((
+                        max(event['start'], day_start),
+                        min(event['end'], day_start + timedelta(days=1))
+                    ))
+        return {day: merge_intervals(intervals) for day, intervals in buckets.items()}
+
+    def _build_feed(self, agent_id: str, horizon_start: date, buckets: Dict[date, List[Interval]]) -> Dict:
+        """Assemble a feed from day buckets, keeping cached payloads if nothing changed"""
+        busy = merge_intervals([
+            interval for day in sorted(buckets) for interval in buckets[day]
+        ])
+        start = self._day_start(horizon_start)
+        end = start + timedelta(days=self.horizon_days)
+
+        fingerprint = hashlib.sha1(start.isoformat().encode())
+        for busy_start, busy_end in busy:
+            fingerprint.update(f"{busy_start.isoformat()}/{busy_end.isoformat()};".encode())
+        etag = fingerprint.hexdigest()
+
+        previous = self._feeds.get(agent_id)
+        if previous and previous['etag'] == etag:
+            previous['buckets'] = buckets
+            return previous
+
+        return {
+            'start': start,
+            'end': end,
+            'horizon_start': horizon_start,
+            'buckets': buckets,
+            'busy': busy,
+            'etag': etag,
+            'updated_at': datetime.now(pytz.UTC),
+            'payloads': {}
+        }
+
+    def _get_feed(self, agent_id: str) -> Dict:
+        """Get the feed for an agent, computing it or rolling its horizon forward as needed"""
+        # Reading the version picks up a calendar file rewritten on disk, which invalidates the feed
+        self.calendar_store.get_version(agent_id)
+        today = self._today()
+        feed = self._feeds.get(agent_id)
+        if feed and feed['horizon_start'] == today:
+            return feed
+
+        horizon_days = [today + timedelta(days=offset) for offset in range(self.horizon_days)]
+        horizon_day_set = set(horizon_days)
+        # Reuse buckets still inside the horizon and only compute the new days
+        buckets = {
+            day: intervals for day, intervals in (feed['buckets'] if feed else {}).items()
+            if day in horizon_day_set
+        }
+        buckets.update(self._compute_buckets(agent_id, [day for day in horizon_days if day not in buckets]))
+
+        feed = self._build_feed(agent_id, today, buckets)
+        self._feeds[agent_id] = feed
+        return feed
+
+    def invalidate(self, agent_id: str, changed_ranges: List[Tuple[datetime, datetime]]) -> None:
+        """Recompute only the day buckets touched by changed events"""
+        feed = self._feeds.get(agent_id)
+        if not feed:
+            return
+
+        affected_days = {
+            day
+            for range_start, range_end in changed_ranges
+            for day in self._days_touched(range_start, range_end)
+            if day in feed['buckets']
+        }
+        if not affected_days:
+            return
+
+        buckets = dict(feed['buckets'])
+        buckets.update(self._compute_buckets(agent_id, sorted(affected_days)))
+        self._feeds[agent_id] = self._build_feed(agent_id, feed['horizon_start'], buckets)
+
+    def get_etag(self, agent_id: str) -> str:
+        """Get the current ETag of an agent's free/busy feed"""
+        return self._get_feed(agent_id)['etag']
+
+    def get_free_busy(self, agent_id: str) -> Dict:
+        """Get merged busy intervals for an agent as a JSON-serializable dict"""
+        feed = self._get_feed(agent_id)
+        if 'json' not in feed['payloads']:
+            feed['payloads']['json'] = {
+                'agent_id': agent_id,
+                'start': feed['start'].isoformat(),
+                'end': feed['end'].isoformat(),
+                'busy': [
+                    {'start': busy_start.isoformat(), 'end': busy_end.isoformat()}
+                    for busy_start, busy_end in feed['busy']
+                ]
+            }
+        return feed['payloads']['json']
+
+    def get_vfreebusy(self, agent_id: str) -> bytes:
+        """Get merged busy intervals for an agent as an RFC 5545 VFREEBUSY calendar"""
+        feed = self._get_feed(agent_id)
+        if 'ics' not in feed['payloads']:
+            feed['payloads']['ics'] = serialize_free_busy(
+                PRODID,
+                f"freebusy-{agent_id}-{feed['etag']}",
+                feed['start'],
+                feed['end'],
+                feed['busy'],
+                feed['updated_at']
+            )
+        return feed['payloads']['ics']
@@ -0,0 +1,157 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, time
+from typing import Dict, List, Tuple
+import json
+from pathlib import Path
+import pytz
+from utils.intervals import Interval, clip_intervals, contains_interval, merge_intervals
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+class WorkingHoursService:
+    """
+    Per-agent timezone and working-hours profiles, compiled into UTC availability masks.
+
+    Each agent's weekly working hours are expanded once into a sorted list of UTC
+    intervals covering a rolling window of dates. Localization happens per working
+    day while compiling, so DST transitions are reflected in the mask and slot
+    searches only need plain UTC comparisons against it.
+    """
+
+    def __init__(self,
+                 profile_file: str = "data/mock/agent_profiles.json",
+                 horizon_days: int = 90):
+        profile_path = Path(__file__).parent.parent / profile_file
+        if not profile_path.exists():
+            raise FileNotFoundError(f"Agent profile file not found at {profile_path}")
+
+        with open(profile_path, 'r') as f:
+            profile_data = json.load(f)
+
+        self.default_profile = profile_data['default']
+        self.profiles = {
+            profile['agent_id']: profile for profile in profile_data.get('agents', [])
+        }
+        self.horizon_days = horizon_days
+        # Resolve every timezone up front so unknown zones fail at load time
+        self._timezones = {
+            agent_id: self._parse_timezone(agent_id, profile['timezone'])
+            for agent_id, profile in self.profiles.items() if 'timezone' in profile
+        }
+        self._default_timezone = self._parse_timezone('default', self.default_profile['timezone'])
+        # Parse every profile up front so malformed working hours fail at load time
+        self._weekly_hours = {
+            agent_id: self._parse_working_hours(agent_id, profile['working_hours'])
+            for agent_id, profile in self.profiles.items() if 'working_hours' in profile
+        }
+        self._default_weekly_hours = self._parse_working_hours('default', self.default_profile['working_hours'])
+        # agent_id -> (compiled range start, compiled range end, intervals, interval starts)
+        self._masks: Dict[str, Tuple[datetime, datetime, List[Interval], List[datetime]]] = {}
+
+    def _make_timezone_aware(self, dt: datetime) -> datetime:
+        """Ensure a datetime is timezone-aware, converting to UTC"""
+        if dt.tzinfo is None:
+            return pytz.UTC.localize(dt)
+        return dt.astimezone(pytz.UTC)
+
+    def get_profile(self, agent_id: str) -> Dict:
+        """Get the timezone and working-hours profile for an agent, falling back to the default"""
+        profile = self.profiles.get(agent_id, {})
+        return {
+            'timezone': profile.get('timezone', self.default_profile['timezone']),
+            'working_hours': profile.get('working_hours', self.default_profile['working_hours'])
+        }
+
+    def get_timezone(self, agent_id: str):
+        """Get the pytz timezone for an agent"""
+        return self._timezones.get(agent_id, self._default_timezone)
+
+    def _parse_timezone(self, agent_id: str, timezone: str):
+        try:
+            return pytz.timezone(timezone)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown timezone '{timezone}' for {agent_id}")
+
+    def _parse_working_hours(self, agent_id: str, working_hours: Dict) -> Dict[int, List[Tuple[time, time]]]:
+        """
+        Parse a weekly working-hours profile into weekday index -> list of (start, end) times.
+        A span whose end is before its start (e.g. 22:00-06:00) runs past midnight into the next day.
+        """
+        weekly_hours = {}
+        for weekday, spans in working_hours.items():
+            if weekday.lower() not in WEEKDAYS:
+                raise ValueError(f"Invalid weekday '{weekday}' in working hours for {agent_id}")
+            parsed_spans = []
+            for span in spans:
+                span_start = time.fromisoformat(span['start'])
+                span_end = time.fromisoformat(span['end'])
+                if span_start == span_end:
+                    raise ValueError(
+                        f"Working hours span {span['start']}-{span['end']} on {weekday} for {agent_id} is empty"
+                    )
+                parsed_spans.append((span_start, span_end))
+            weekly_hours[WEEKDAYS.index(weekday.lower())] = parsed_spans
+        return weekly_hours
+
+    def get_weekly_hours(self, agent_id: str) -> Dict[int, List[Tuple[time, time]]]:
+        """Get the parsed weekly working hours of an agent: weekday index (Monday = 0) -> (start, end) times"""
+        return self._weekly_hours.get(agent_id, self._default_weekly_hours)
+
+    def _compile_mask(self, agent_id: str, range_start: datetime, range_end: datetime) -> List[Interval]:
+        """Expand the weekly working hours of an agent into UTC intervals over a date range"""
+        tz = self.get_timezone(agent_id)
+        weekly_hours = self.get_weekly_hours(agent_id)
+
+        intervals = []
+        # Pad by a day on each side so local days straddling the UTC range are included
+        day = range_start.astimezone(tz).date() - timedelta(days=1)
+        last_day = range_end.astimezone(tz).date() + timedelta(days=1)
+        while day <= last_day:
+            for span_start, span_end in weekly_hours.get(day.weekday(), []):
+                # normalize() shifts times that fall into a DST gap onto a valid wall time
+                local_start = tz.normalize(tz.localize(datetime.combine(day, span_start)))
+                end_day = day + timedelta(days=1) if span_end < span_start else day
+                local_end = tz.normalize(tz.localize(datetime.combine(end_day, span_end)))
+                intervals.append((local_start.astimezone(pytz.UTC), local_end.astimezone(pytz.UTC)))
+            day += timedelta(days=1)
+
+        return merge_intervals(intervals)
+
+    def _get_compiled_mask(self, agent_id: str,
+                           start_time: datetime,
+                           end_time: datetime) -> Tuple[List[Interval], List[datetime]]:
+        """
+        Return the compiled mask for an agent, recompiling only if the range is not covered.
+        A recompile covers just the requested range plus the horizon, replacing the cached
+        mask, so far-off queries don't grow the mask to span every date ever asked for.
+        """
+        cached = self._masks.get(agent_id)
+        if cached and cached[0] <= start_time and end_time <= cached[1]:
+            return cached[2], cached[3]
+
+        range_start = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        range_end = max(end_time, range_start + timedelta(days=self.horizon_days))
+
+        intervals = self._compile_mask(agent_id, range_start, range_end)
+        starts = [interval_start for interval_start, _ in intervals]
+        self._masks[agent_id] = (range_start, range_end, intervals, starts)
+        return intervals, starts
+
+    def get_working_intervals(self, agent_id: str,
+                              start_time: datetime,
+                              end_time: datetime) -> List[Interval]:
+        """Get the UTC working intervals of an agent clipped to [start_time, end_time)"""
+        start_time = self._make_timezone_aware(start_time)
+        end_time = self._make_timezone_aware(end_time)
+        intervals, starts = self._get_compiled_mask(agent_id, start_time, end_time)
+        first = max(bisect_right(starts, start_time) - 1, 0)
+        return clip_intervals(intervals[first:], start_time, end_time)
+
+    def is_within_working_hours(self, agent_id: str,
+                                start_time: datetime,
+                                end_time: datetime) -> bool:
+        """Check whether [start_time, end_time) falls entirely inside the agent's working hours"""
+        start_time = self._make_timezone_aware(start_time)
+        end_time = self._make_timezone_aware(end_time)
+        intervals, starts = self._get_compiled_mask(agent_id, start_time, end_time)
+        return contains_interval(intervals, starts, start_time, end_time)
@@ -1,16 +1,80 @@
 from icalendar import Calendar
-from datetime import datetime, timedelta
+from collections import Counter, deque
+from datetime import datetime, time, timedelta
 import os
-from typing import Dict, List
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 from utils.calendar_mock_generator import generate_mock_calendar
+from utils.ics_writer import serialize_events, write_atomic
 import pytz
 
+PRODID = '-//HouseWhisper Calendar//'
+
+# Called with an agent id and the (start, end) ranges whose events changed
+ChangeListener = Callable[[str, List[Tuple[datetime, datetime]]], None]
+
+# VEVENT properties that survive a parse and re-serialize round trip
+SUPPORTED_PROPERTIES = {'UID', 'SUMMARY', 'DESCRIPTION', 'DTSTART', 'DTEND', 'DURATION', 'DTSTAMP'}
+
+def parse_ics_events(ics_data: bytes, dropped_properties: Optional[Counter] = None) -> List[Dict]:
+    """
+    Parse the VEVENTs of an ICS calendar into event dicts with UTC datetimes.
+    If dropped_properties is given, it counts the events per property that the event dicts
+    can't represent (e.g. LOCATION or RRULE), with all-day events counted as VALUE=DATE.
+    """
+    cal = Calendar.from_ical(ics_data)
+    events = []
+    for component in cal.walk('VEVENT'):
+        if dropped_properties is not None:
+            dropped_properties.update(name for name in component.keys() if name not in SUPPORTED_PROPERTIES)
+            if not isinstance(component.get('dtstart').dt, datetime):
+                dropped_properties['VALUE=DATE'] += 1
+
+        event_start = component.get('dtstart').dt
+        if component.get('dtend') is not None:
+            event_end = component.get('dtend').dt
+        elif component.get('duration') is not None:
+            event_end = event_start + component.get('duration').dt
+        elif isinstance(event_start, datetime):
+            # RFC 5545: without DTEND or DURATION a date-time event ends when it starts
+            event_end = event_start
+        else:
+            # ...and a date event lasts one day
+            event_end = event_start + timedelta(days=1)
+        
+        # Convert to datetime if date; a date DTEND is exclusive, so it ends at that day's midnight
+        if not isinstance(event_start, datetime):
+            event_start = datetime.combine(event_start, time.min)
+        if not isinstance(event_end, datetime):
+            event_end = datetime.combine(event_end, time.min)
+        
+        # Make timezone-aware
+        event_start = pytz.UTC.localize(event_start) if event_start.tzinfo is None else event_start.astimezone(pytz.UTC)
+        event_end = pytz.UTC.localize(event_end) if event_end.tzinfo is None else event_end.astimezone(pytz.UTC)
+        
+        events.append({
+            'start': event_start,
+            'end': event_end,
+            'summary': str(component.get('summary')),
+            'description': str(component.get('description', '')),
+            'uid': str(component.get('uid', ''))
+        })
+    return events
+
 class CalendarStore:
-    def __init__(self):
+    def __init__(self, change_log_size: int = 1000):
         self.calendars_dir = Path(__file__).parent.parent / 'data' / 'calendars'
         self.calendars_dir.mkdir(parents=True, exist_ok=True)
         self._cache: Dict[str, List[Dict]] = {}
+        # (mtime, size) of each calendar file when it was last read or written by this store
+        self._file_stamps: Dict[str, Tuple[int, int]] = {}
+        self._listeners: List[ChangeListener] = []
+        # Versions only increase within one store instance; the epoch tells clients when they were reset
+        self.epoch = uuid.uuid4().hex
+        self._versions: Dict[str, int] = {}
+        self._change_logs: Dict[str, deque] = {}
+        self.change_log_size = change_log_size
         self.timezone = pytz.UTC  # Use UTC as our standard timezone
 
     def _ensure_calendar_exists(self, agent_id: str) -> None:
@@ -25,47 +89,186 @@ class CalendarStore:
             return self.timezone.localize(dt)
         return dt.astimezone(self.timezone)
 
-    def get_events(self, agent_id: str, start_time: datetime, end_time: datetime) -> List[Dict]:
-        """Get events for an agent within the specified time range"""
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Register a callback that is notified whenever an agent's events change"""
+        self._listeners.append(listener)
+
+    def _record_changes(self, agent_id: str, changes: List[Tuple[str, Optional[Dict], Optional[Dict]]]) -> None:
+        """
+        Bump the agent's version once per change, append it to the bounded change log
+        and notify listeners. Each change is (type, old event, new event) with type
+        'added', 'removed' or 'modified'.
+        """
+        if not changes:
+            return
+        
+        change_log = self._change_logs.setdefault(agent_id, deque(maxlen=self.change_log_size))
+        changed_ranges = []
+        for change_type, old_event, new_event in changes:
+            self._versions[agent_id] = self._versions.get(agent_id, 0) + 1
+            change_log.append({
+                'version': self._versions[agent_id],
+                'type': change_type,
+                'uid': (new_event or old_event)['uid'],
+                'event': new_event
+            })
+            changed_ranges.extend((event['start'], event['end']) for event in (old_event, new_event) if event)
+        
+        for listener in self._listeners:
+            listener(agent_id, changed_ranges)
+
+    def get_version(self, agent_id: str) -> int:
+        """Get the current version of an agent's calendar, which increases with every change"""
+        self._load_events(agent_id)
+        return self._versions.get(agent_id, 0)
+
+    def get_changes(self, agent_id: str, since: int) -> Optional[List[Dict]]:
+        """
+        Get the changes made after version `since`, oldest first.
+        Returns None if they are no longer in the change log (or `since` is unknown),
+        in which case the caller has to resync the full calendar.
+        """
+        version = self.get_version(agent_id)
+        if since == version:
+            return []
+        if since > version:
+            return None
+        
+        change_log = self._change_logs.get(agent_id)
+        # The log must still contain the change right after `since`
+        if not change_log or change_log[0]['version'] > since + 1:
+            return None
+        return [change for change in change_log if change['version'] > since]
+
+    def get_all_events(self, agent_id: str) -> List[Dict]:
+        """Get every event of an agent, ordered by start time"""
+        return list(self._load_events(agent_id) or [])
+
+    def _get_file_stamp(self, agent_id: str) -> Optional[Tuple[int, int]]:
+        """Get the (mtime, size) of an agent's calendar file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(self.calendars_dir / f'{agent_id}.ics')
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_events(self, agent_id: str) -> Optional[List[Dict]]:
+        """
+        Load an agent's events into the cache if needed, returning None if the calendar can't be read.
+        If the file was rewritten outside this store (e.g. by the bulk pipeline), it is re-parsed and
+        the difference goes through set_events, so versions, the change log and listeners see it.
+        """
         self._ensure_calendar_exists(agent_id)
         
+        file_stamp = self._get_file_stamp(agent_id)
+        if agent_id in self._cache and file_stamp == self._file_stamps.get(agent_id):
+            return self._cache[agent_id]
+
+        calendar_path = self.calendars_dir / f'{agent_id}.ics'
+        try:
+            with open(calendar_path, 'rb') as f:
+                events = parse_ics_events(f.read())
+        except Exception as e:
+            print(f"Error loading calendar for agent {agent_id}: {str(e)}")
+            # Remember the stamp so a broken file isn't re-parsed on every call
+            self._file_stamps[agent_id] = file_stamp
+            return self._cache.get(agent_id)
+        self.set_events(agent_id, events)
+        # Keep the stamp from before the read, so a rewrite during the read is picked up next time
+        self._file_stamps[agent_id] = file_stamp
+        return self._cache[agent_id]
+
+    def _save_calendar(self, agent_id: str) -> None:
+        """Persist the cached events of an agent back to its ICS file"""
+        write_atomic(self.calendars_dir / f'{agent_id}.ics', serialize_events(PRODID, self._cache[agent_id]))
+        self._file_stamps[agent_id] = self._get_file_stamp(agent_id)
+
+    def set_events(self, agent_id: str, events: List[Dict]) -> None:
+        """
+        Populate the cache for an agent with already-parsed events of its calendar file,
+        e.g. from a bulk import that just wrote the file.
+        """
+        loaded = agent_id in self._cache
+        previous = {event['uid']: event for event in self._cache.get(agent_id, [])}
+        self._cache[agent_id] = sorted(events, key=lambda event: event['start'])
+        self._file_stamps[agent_id] = self._get_file_stamp(agent_id)
+        if not loaded:
+            return
+        
+        # Only events that were added, removed or modified count as changes
+        changes = []
+        current = {event['uid']: event for event in events}
+        for uid in sorted(previous.keys() | current.keys()):
+            old_event = previous.get(uid)
+            new_event = current.get(uid)
+            if old_event is None:
+                changes.append(('added', None, new_event))
+            elif new_event is None:
+                changes.append(('removed', old_event, None))
+            elif old_event != new_event:
+                changes.append(('modified', old_event, new_event))
+        self._record_changes(agent_id, changes)
+
+    def add_event(self, agent_id: str, event: Dict) -> None:
+        """Add an event to an agent's calendar"""
+        events = self._load_events(agent_id)
+        if events is None:
+            raise FileNotFoundError(f"Calendar for agent {agent_id} could not be loaded")
+        if any(existing['uid'] == event['uid'] for existing in events):
+            raise ValueError(f"Event {event['uid']} already exists for agent {agent_id}")
+        
+        event = dict(event, start=self._make_timezone_aware(event['start']), end=self._make_timezone_aware(event['end']))
+        events.append(event)
+        events.sort(key=lambda existing: existing['start'])
+        self._save_calendar(agent_id)
+        self._record_changes(agent_id, [('added', None, event)])
+
+    def update_event(self, agent_id: str, uid: str, changes: Dict) -> Dict:
+        """Update fields of an existing event, returning the updated event"""
+        events = self._load_events(agent_id) or []
+        for index, existing in enumerate(events):
+            if existing['uid'] == uid:
+                break
+        else:
+            raise ValueError(f"Event {uid} not found for agent {agent_id}")
+        
+        if changes.get('uid', uid) != uid:
+            raise ValueError(f"The UID of event {uid} cannot be changed")
+        updated = dict(existing, **changes)
+        updated['start'] = self._make_timezone_aware(updated['start'])
+        updated['end'] = self._make_timezone_aware(updated['end'])
+        events[index] = updated
+        events.sort(key=lambda event: event['start'])
+        self._save_calendar(agent_id)
+        self._record_changes(agent_id, [('modified', existing, updated)])
+        return updated
+
+    def remove_event(self, agent_id: str, uid: str) -> Dict:
+        """Remove an event from an agent's calendar, returning the removed event"""
+        events = self._load_events(agent_id) or []
+        for index, existing in enumerate(events):
+            if existing['uid'] == uid:
+                break
+        else:
+            raise ValueError(f"Event {uid} not found for agent {agent_id}")
+        
+        del events[index]
+        self._save_calendar(agent_id)
+        self._record_changes(agent_id, [('removed', existing, None)])
+        return existing
+
+    def get_events(self, agent_id: str, start_time: datetime, end_time: datetime) -> List[Dict]:
+        """Get events for an agent within the specified time range"""
         # Make input times timezone-aware if they aren't already
         start_time = self._make_timezone_aware(start_time)
         end_time = self._make_timezone_aware(end_time)
         
-        if agent_id not in self._cache:
-            calendar_path = self.calendars_dir / f'{agent_id}.ics'
-            try:
-                with open(calendar_path, 'rb') as f:
-                    cal = Calendar.from_ical(f.read())
-                    events = []
-                    for component in cal.walk('VEVENT'):
-                        event_start = component.get('dtstart').dt
-                        event_end = component.get('dtend').dt
-                        
-                        # Convert to datetime if date
-                        if not isinstance(event_start, datetime):
-                            event_start = datetime.combine(event_start, datetime.min.time())
-                        if not isinstance(event_end, datetime):
-                            event_end = datetime.combine(event_end, datetime.max.time())
-                        
-                        # Make timezone-aware
-                        event_start = self._make_timezone_aware(event_start)
-                        event_end = self._make_timezone_aware(event_end)
-                        
-                        events.append({
-                            'start': event_start,
-                            'end': event_end,
-                            'summary': str(component.get('summary')),
-                            'description': str(component.get('description', ''))
-                        })
-                    self._cache[agent_id] = events
-            except Exception as e:
-                print(f"Error loading calendar for agent {agent_id}: {str(e)}")
-                return []
+        events = self._load_events(agent_id)
+        if events is None:
+            return []
 
         # Filter events within the time range
         return [
-            event for event in self._cache[agent_id]
+            event for event in events
             if not (event['end'] <= start_time or event['start'] >= end_time)
-        ] 
\ No newline at end of file
+        ]
@@ -0,0 +1,163 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import pytz
+from openai import OpenAI
+
+from services.ai_availability_service import AIAvailabilityService
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+class FakeCalendarStore:
+    def get_events(self, agent_id, start_time, end_time):
+        return []
+
+class FakeStreamingHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /v1/chat/completions endpoint that streams chunked SSE completions"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _write_event(self, content: str):
+        chunk = {
+            'id': 'chatcmpl-test',
+            'object': 'chat.completion.chunk',
+            'created': 0,
+            'model': 'gpt-4',
+            'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}]
+        }
+        self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        first, *rest = server.contents
+        self._write_event(first)
+        # Hold back the rest until the client has seen the first delta
+        server.release.wait(timeout=5)
+        for content in rest:
+            self._write_event(content)
+
+        if server.fail_mid_stream:
+            # Drop the connection without finishing the chunked body
+            self.close_connection = True
+            return
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeStreamingHandler)
+    server.contents = []
+    server.fail_mid_stream = False
+    server.release = threading.Event()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def service(fake_server, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    service = AIAvailabilityService(FakeCalendarStore())
+    host, port = fake_server.server_address
+    service.openai_client = OpenAI(api_key='test-key', base_url=f'http://{host}:{port}/v1', max_retries=0)
+    return service
+
+# Monday is the longest block, so matching Tuesday proves the streamed text was used
+CANDIDATE_BLOCKS = [
+    {'start': utc(2025, 1, 6, 9), 'end': utc(2025, 1, 6, 17), 'duration_minutes': 480},
+    {'start': utc(2025, 1, 7, 14), 'end': utc(2025, 1, 7, 16), 'duration_minutes': 120},
+]
+
+def test_stream_yields_deltas_before_result(service, fake_server):
+    fake_server.contents = ["I recommend ", "Tuesday 02:00 PM", " for deep work."]
+    messages = service.stream_best_work_block(CANDIDATE_BLOCKS, "prompt", "AG001")
+
+    first = next(messages)
+    assert first == {'type': 'delta', 'content': "I recommend "}
+    # The first delta arrived while the server was still holding back the rest
+    fake_server.release.set()
+
+    rest = list(messages)
+    assert [message['type'] for message in rest] == ['delta', 'delta', 'result']
+    assert rest[-1]['block']['start'] == utc(2025, 1, 7, 14)
+    assert rest[-1]['block']['ai_reasoning'] == "I recommend Tuesday 02:00 PM for deep work."
+
+def test_match_recommended_block_picks_named_block(service):
+    block = service._match_recommended_block(CANDIDATE_BLOCKS, "Go with tuesday 02:00 pm.", "AG001")
+    assert block['start'] == utc(2025, 1, 7, 14)
+
+    fallback = service._match_recommended_block(CANDIDATE_BLOCKS, "No clear preference.", "AG001")
+    assert fallback['start'] == utc(2025, 1, 6, 9)
+
+def test_stream_yields_error_when_upstream_fails_mid_stream(service, fake_server):
+    fake_server.contents = ["I recommend ", "Tuesday"]
+    fake_server.fail_mid_stream = True
+    fake_server.release.set()
+
+    messages = list(service.stream_best_work_block(CANDIDATE_BLOCKS, "prompt", "AG001"))
+    assert [message['type'] for message in messages] == ['delta', 'delta', 'error']
+    assert messages[-1]['detail']
+
+def make_blocks(count):
+    return [
+        {'start': utc(2025, 1, 6 + day, 9), 'end': utc(2025, 1, 6 + day, 12), 'duration_minutes': 180}
+        for day in range(count)
+    ]
+
+def test_prompt_budget_stops_adding_blocks_but_keeps_one(service):
+    agent_info = service._get_agent_info('AG001')
+    patterns = service._analyze_calendar_patterns([], agent_info)
+    blocks = make_blocks(5)
+
+    service.prompt_token_budget = 10000
+    full_prompt, full_blocks = service._format_work_block_prompt(blocks, patterns, agent_info)
+    assert full_prompt.count('(Duration:') == 5
+    assert full_blocks == blocks
+
+    service.prompt_token_budget = service._estimate_tokens(full_prompt) - 20
+    trimmed_prompt, trimmed_blocks = service._format_work_block_prompt(blocks, patterns, agent_info)
+    assert 1 <= trimmed_prompt.count('(Duration:') < 5
+    assert len(trimmed_blocks) == trimmed_prompt.count('(Duration:')
+
+    service.prompt_token_budget = 1
+    minimal_prompt, minimal_blocks = service._format_work_block_prompt(blocks, patterns, agent_info)
+    assert minimal_prompt.count('(Duration:') == 1
+    assert minimal_blocks == blocks[:1]
+
+def test_prompt_budget_drops_lowest_scored_blocks(service):
+    agent_info = service._get_agent_info('AG001')
+    patterns = service._analyze_calendar_patterns([], agent_info)
+    # Later blocks are longer, so they score higher than the earlier ones
+    blocks = [
+        {'start': utc(2025, 1, 6 + day, 17), 'end': utc(2025, 1, 6 + day, 18 + day), 'duration_minutes': 60 * (day + 1)}
+        for day in range(4)
+    ]
+    candidates = service._select_candidate_blocks(blocks, 'AG001')
+    assert candidates == blocks[::-1]
+
+    service.prompt_token_budget = 1
+    _, kept = service._format_work_block_prompt(candidates, patterns, agent_info)
+    assert kept == [blocks[-1]]
+
+    service.prompt_token_budget = 10000
+    _, kept = service._format_work_block_prompt(candidates, patterns, agent_info)
+    # Kept blocks are listed chronologically
+    assert kept == blocks
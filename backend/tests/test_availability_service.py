@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+
+import pytz
+
+from models.schemas import TimeRange
+from services.availability_service import AvailabilityService
+from services.working_hours_service import WorkingHoursService
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+class FakeCalendarStore:
+    def __init__(self, events):
+        self.events = events
+
+    def get_events(self, agent_id, start_time, end_time):
+        return [
+            event for event in self.events
+            if not (event['end'] <= start_time or event['start'] >= end_time)
+        ]
+
+def make_working_hours(tmp_path, timezone="America/Los_Angeles"):
+    profile_path = tmp_path / "agent_profiles.json"
+    profile_path.write_text(json.dumps({
+        "default": {
+            "timezone": timezone,
+            "working_hours": {
+                day: [{"start": "09:00", "end": "17:00"}]
+                for day in ["monday", "tuesday", "wednesday", "thursday", "friday"]
+            }
+        },
+        "agents": []
+    }))
+    return WorkingHoursService(profile_file=str(profile_path))
+
+def test_enumerate_free_blocks_merges_nested_events_and_includes_tail():
+    store = FakeCalendarStore([
+        {'start': utc(2025, 1, 6, 10), 'end': utc(2025, 1, 6, 14)},
+        {'start': utc(2025, 1, 6, 11), 'end': utc(2025, 1, 6, 12)},
+    ])
+    service = AvailabilityService(store)
+    blocks = list(service.enumerate_free_blocks("AG001", utc(2025, 1, 6, 9), utc(2025, 1, 6, 20), 30))
+    assert blocks == [(utc(2025, 1, 6, 9), utc(2025, 1, 6, 10)), (utc(2025, 1, 6, 14), utc(2025, 1, 6, 20))]
+
+def test_step_alignment_is_relative_to_local_midnight(tmp_path):
+    service = AvailabilityService(FakeCalendarStore([]), make_working_hours(tmp_path))
+    # 2025-01-06 09:00 PST is 17:00Z; a 45 minute grid from local midnight keeps 9:00 on the grid
+    blocks = list(service.enumerate_free_blocks("AG001", utc(2025, 1, 6, 12), utc(2025, 1, 7, 12), 60, step_minutes=45))
+    assert blocks == [(utc(2025, 1, 6, 17), utc(2025, 1, 7, 1))]
+
+def test_step_alignment_with_half_hour_offset(tmp_path):
+    service = AvailabilityService(FakeCalendarStore([]), make_working_hours(tmp_path, "Asia/Kolkata"))
+    # 09:00 IST (UTC+5:30) is 03:30Z and must not be rounded to 04:00Z
+    blocks = list(service.enumerate_free_blocks("AG001", utc(2025, 1, 6, 0), utc(2025, 1, 6, 12), 60, step_minutes=60))
+    assert blocks == [(utc(2025, 1, 6, 3, 30), utc(2025, 1, 6, 11, 30))]
+
+def test_find_best_work_blocks_returns_top_k_by_score():
+    store = FakeCalendarStore([
+        {'start': utc(2025, 1, 6, 10), 'end': utc(2025, 1, 6, 11)},
+        {'start': utc(2025, 1, 6, 14), 'end': utc(2025, 1, 6, 15)},
+    ])
+    service = AvailabilityService(store)
+    blocks = service.find_best_work_blocks("AG001", 30, k=2, horizon_days=1, start_time=utc(2025, 1, 6, 9))
+    assert [(block.start, block.end) for block in blocks] == [
+        (utc(2025, 1, 6, 15), utc(2025, 1, 7, 9)),
+        (utc(2025, 1, 6, 11), utc(2025, 1, 6, 14)),
+    ]
+
+def test_find_available_slots_stays_within_working_hours(tmp_path):
+    service = AvailabilityService(FakeCalendarStore([]), make_working_hours(tmp_path))
+    slots = service.find_available_slots(
+        "AG001", [TimeRange(start=utc(2025, 1, 6, 0), end=utc(2025, 1, 7, 0))], 60, num_slots=2
+    )
+    assert [slot.start for slot in slots] == [utc(2025, 1, 6, 17), utc(2025, 1, 6, 17, 30)]
@@ -0,0 +1,126 @@
+import json
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from services.working_hours_service import WorkingHoursService
+from storage.calendar_store import CalendarStore, parse_ics_events
+from utils.bulk_calendar_pipeline import bulk_generate_calendars, bulk_import_calendars
+
+DURATION_CALENDAR = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Test//\r
+BEGIN:VEVENT\r
+UID:duration-event\r
+SUMMARY:Showing\r
+DTSTART:20250106T170000Z\r
+DURATION:PT1H30M\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+ALL_DAY_CALENDAR = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Test//\r
+BEGIN:VEVENT\r
+UID:open-house\r
+SUMMARY:Open House\r
+LOCATION:12 Main St\r
+DTSTART;VALUE=DATE:20250106\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:conference\r
+SUMMARY:Conference\r
+DTSTART;VALUE=DATE:20250107\r
+DTEND;VALUE=DATE:20250109\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+RECURRING_CALENDAR = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Test//\r
+BEGIN:VEVENT\r
+UID:weekly-sync\r
+SUMMARY:Team Sync\r
+DTSTART:20250106T170000Z\r
+DTEND:20250106T173000Z\r
+RRULE:FREQ=WEEKLY;BYDAY=MO\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+@pytest.fixture
+def store(tmp_path):
+    store = CalendarStore()
+    store.calendars_dir = tmp_path / "calendars"
+    store.calendars_dir.mkdir()
+    return store
+
+@pytest.fixture
+def working_hours(tmp_path):
+    profile_path = tmp_path / "agent_profiles.json"
+    profile_path.write_text(json.dumps({
+        "default": {
+            "timezone": "America/Los_Angeles",
+            "working_hours": {
+                day: [{"start": "09:00", "end": "17:00"}]
+                for day in ["monday", "tuesday", "wednesday", "thursday", "friday"]
+            }
+        },
+        "agents": []
+    }))
+    return WorkingHoursService(profile_file=str(profile_path))
+
+def test_parse_ics_events_supports_duration():
+    events = parse_ics_events(DURATION_CALENDAR)
+    assert len(events) == 1
+    assert (events[0]['end'] - events[0]['start']).total_seconds() == 90 * 60
+
+def test_parse_ics_events_all_day_end_is_exclusive():
+    events = parse_ics_events(ALL_DAY_CALENDAR)
+    assert [(event['start'], event['end']) for event in events] == [
+        (pytz.UTC.localize(datetime(2025, 1, 6)), pytz.UTC.localize(datetime(2025, 1, 7))),
+        (pytz.UTC.localize(datetime(2025, 1, 7)), pytz.UTC.localize(datetime(2025, 1, 9))),
+    ]
+
+def test_import_reports_dropped_properties_and_recurring_events(tmp_path, store):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "AG001.ics").write_bytes(ALL_DAY_CALENDAR)
+    (source_dir / "AG002.ics").write_bytes(RECURRING_CALENDAR)
+
+    stats = bulk_import_calendars(str(source_dir), store=store, workers=1)
+
+    assert stats['dropped_properties'] == {'LOCATION': 1, 'VALUE=DATE': 2}
+    assert stats['failed'] == 1
+    assert stats['failures'][0]['agent_id'] == "AG002"
+    assert "RRULE" in stats['failures'][0]['error']
+    assert not (store.calendars_dir / "AG002.ics").exists()
+    assert b"DTSTAMP:" in (store.calendars_dir / "AG001.ics").read_bytes()
+
+def test_import_reports_bad_files_without_aborting(tmp_path, store):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "AG001.ics").write_bytes(DURATION_CALENDAR)
+    (source_dir / "AG002.ics").write_bytes(b"not a calendar")
+
+    stats = bulk_import_calendars(str(source_dir), store=store, workers=1)
+
+    assert stats['agents'] == 1
+    assert stats['failed'] == 1
+    assert stats['failures'][0]['agent_id'] == "AG002"
+    assert (store.calendars_dir / "AG001.ics").exists()
+    assert [event['uid'] for event in store.get_all_events("AG001")] == ["duration-event"]
+
+def test_generated_events_fall_inside_local_working_hours(store, working_hours):
+    stats = bulk_generate_calendars(
+        ["AG001"], store=store, working_hours=working_hours,
+        days=28, start_date=date(2025, 3, 1), seed=7, workers=1
+    )
+
+    events = store.get_all_events("AG001")
+    assert stats['events'] == len(events) > 0
+    for event in events:
+        assert working_hours.is_within_working_hours("AG001", event['start'], event['end'])
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from services.change_feed_service import ChangeFeedService
+from storage.calendar_store import CalendarStore
+
+def make_event(uid, day=6, hour=10):
+    start = pytz.UTC.localize(datetime(2025, 1, day, hour))
+    return {'uid': uid, 'start': start, 'end': start + timedelta(hours=1), 'summary': 'Meeting', 'description': ''}
+
+@pytest.fixture
+def store(tmp_path):
+    store = CalendarStore(change_log_size=3)
+    store.calendars_dir = tmp_path
+    (tmp_path / "AG001.ics").write_bytes(b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n")
+    return store
+
+def test_delta_lists_changes_since_version(store):
+    feed = ChangeFeedService(store)
+    store.add_event("AG001", make_event("a"))
+    since = store.get_version("AG001")
+    store.add_event("AG001", make_event("b"))
+    store.update_event("AG001", "a", {'summary': 'Renamed'})
+    store.remove_event("AG001", "b")
+
+    delta = feed.get_delta("AG001", since, store.epoch)
+    assert not delta['reset']
+    assert delta['version'] == since + 3
+    assert [(change['type'], change['uid']) for change in delta['changes']] == [
+        ('added', 'b'), ('modified', 'a'), ('removed', 'b')
+    ]
+    assert delta['changes'][1]['event']['summary'] == 'Renamed'
+    assert delta['changes'][2]['event'] is None
+
+    assert feed.get_delta("AG001", delta['version'], store.epoch)['changes'] == []
+
+def test_delta_resets_on_unknown_epoch_or_truncated_log(store):
+    feed = ChangeFeedService(store)
+    store.add_event("AG001", make_event("a"))
+
+    delta = feed.get_delta("AG001", 0, "another-epoch")
+    assert delta['reset']
+    assert [event['uid'] for event in delta['events']] == ['a']
+
+    for index in range(4):
+        store.add_event("AG001", make_event(f"b{index}", hour=11 + index))
+    # The change log only holds the last 3 changes
+    assert feed.get_delta("AG001", 1, store.epoch)['reset']
+    assert not feed.get_delta("AG001", 2, store.epoch)['reset']
+
+def test_wait_for_change_wakes_on_change_and_times_out(store):
+    feed = ChangeFeedService(store)
+    version = store.get_version("AG001")
+
+    async def wait_and_change():
+        waiter = asyncio.ensure_future(feed.wait_for_change("AG001", version, timeout=5))
+        await asyncio.sleep(0.01)
+        store.add_event("AG001", make_event("a"))
+        return await waiter
+
+    assert asyncio.run(wait_and_change())
+    assert not asyncio.run(feed.wait_for_change("AG001", version + 1, timeout=0.01))
+
+def test_calendar_rewritten_on_disk_is_diffed_into_the_feed(store):
+    feed = ChangeFeedService(store)
+    store.add_event("AG001", make_event("a"))
+    store.add_event("AG001", make_event("b", hour=11))
+    version = store.get_version("AG001")
+
+    # Another process rewrites the file, e.g. the bulk pipeline
+    other = CalendarStore()
+    other.calendars_dir = store.calendars_dir
+    other.update_event("AG001", "a", {'summary': 'Moved'})
+    other.remove_event("AG001", "b")
+
+    delta = feed.get_delta("AG001", version, store.epoch)
+    assert not delta['reset']
+    assert [(change['type'], change['uid']) for change in delta['changes']] == [('modified', 'a'), ('removed', 'b')]
+    assert [event['summary'] for event in store.get_all_events("AG001")] == ['Moved']
+    # Reading again without another rewrite doesn't bump the version
+    assert store.get_version("AG001") == delta['version']
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from services.free_busy_service import FreeBusyService
+from storage.calendar_store import CalendarStore
+
+def today_at(hour, days=0):
+    now = datetime.now(pytz.UTC)
+    return now.replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(days=days)
+
+def make_event(uid, start, hours=1):
+    return {'uid': uid, 'start': start, 'end': start + timedelta(hours=hours), 'summary': 'Meeting', 'description': ''}
+
+@pytest.fixture
+def store(tmp_path):
+    store = CalendarStore()
+    store.calendars_dir = tmp_path
+    (tmp_path / "AG001.ics").write_bytes(b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n")
+    return store
+
+def test_free_busy_merges_overlapping_events(store):
+    store.add_event("AG001", make_event("a", today_at(10, days=1), hours=2))
+    store.add_event("AG001", make_event("b", today_at(11, days=1), hours=2))
+    feed = FreeBusyService(store).get_free_busy("AG001")
+    assert feed['busy'] == [{
+        'start': today_at(10, days=1).isoformat(),
+        'end': today_at(13, days=1).isoformat()
+    }]
+    assert 'summary' not in feed['busy'][0]
+
+def test_changes_recompute_only_affected_days(store):
+    service = FreeBusyService(store)
+    etag = service.get_etag("AG001")
+
+    computed = []
+    compute_buckets = service._compute_buckets
+    service._compute_buckets = lambda agent_id, days: computed.append(days) or compute_buckets(agent_id, days)
+
+    # An event crossing midnight touches exactly two day buckets
+    store.add_event("AG001", make_event("late", today_at(23, days=2), hours=2))
+    assert computed == [[(today_at(0, days=2)).date(), (today_at(0, days=3)).date()]]
+    assert service.get_etag("AG001") != etag
+
+    store.remove_event("AG001", "late")
+    assert service.get_etag("AG001") == etag
+
+def test_vfreebusy_lists_busy_periods(store):
+    store.add_event("AG001", make_event("a", today_at(10, days=1)))
+    ics = FreeBusyService(store).get_vfreebusy("AG001").decode()
+    assert "BEGIN:VFREEBUSY" in ics
+    assert f"FREEBUSY;FBTYPE=BUSY:{today_at(10, days=1):%Y%m%dT%H%M%SZ}/{today_at(11, days=1):%Y%m%dT%H%M%SZ}" in ics
+    assert "Meeting" not in ics
+
+def test_update_event_rejects_uid_change(store):
+    store.add_event("AG001", make_event("a", today_at(10, days=1)))
+    with pytest.raises(ValueError):
+        store.update_event("AG001", "a", {'uid': 'b'})
+    updated = store.update_event("AG001", "a", {'uid': 'a', 'summary': 'Renamed'})
+    assert updated['summary'] == 'Renamed'
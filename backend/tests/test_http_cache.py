@@ -0,0 +1,17 @@
+from utils.http_cache import etag_matches
+
+def test_exact_match():
+    assert etag_matches('"abc-json"', '"abc-json"')
+
+def test_weak_validator_matches():
+    assert etag_matches('W/"abc-json"', '"abc-json"')
+
+def test_any_etag_in_list_matches():
+    assert etag_matches('"old", W/"abc-json" , "other"', '"abc-json"')
+
+def test_star_matches():
+    assert etag_matches('*', '"abc-json"')
+
+def test_missing_or_different_does_not_match():
+    assert not etag_matches(None, '"abc-json"')
+    assert not etag_matches('"abc-ics"', '"abc-json"')
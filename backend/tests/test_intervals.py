@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytz
+
+from utils.intervals import find_gaps, intersect_intervals, merge_intervals
+
+def at(hour, minute=0):
+    return pytz.UTC.localize(datetime(2025, 1, 1, hour, minute))
+
+def test_merge_intervals_merges_nested_and_touching():
+    merged = merge_intervals([(at(10), at(14)), (at(11), at(12)), (at(14), at(15)), (at(16), at(17))])
+    assert merged == [(at(10), at(15)), (at(16), at(17))]
+
+def test_find_gaps_ignores_nested_events_and_includes_tail():
+    busy = [(at(10), at(14)), (at(11), at(12)), (at(15), at(16))]
+    assert list(find_gaps(busy, at(9), at(20))) == [
+        (at(9), at(10)),
+        (at(14), at(15)),
+        (at(16), at(20)),
+    ]
+
+def test_find_gaps_touching_events_leave_no_gap():
+    busy = [(at(10), at(11)), (at(11), at(12))]
+    assert list(find_gaps(busy, at(10), at(13))) == [(at(12), at(13))]
+
+def test_find_gaps_busy_outside_window():
+    busy = [(at(6), at(8)), (at(21), at(22))]
+    assert list(find_gaps(busy, at(9), at(20))) == [(at(9), at(20))]
+
+def test_find_gaps_fully_busy():
+    assert list(find_gaps([(at(8), at(21))], at(9), at(20))) == []
+
+def test_intersect_intervals_overlapping_and_nested():
+    first = [(at(9), at(12)), (at(13), at(17))]
+    second = [(at(10), at(11)), (at(11, 30), at(14)), (at(16), at(18))]
+    assert intersect_intervals(first, second) == [
+        (at(10), at(11)),
+        (at(11, 30), at(12)),
+        (at(13), at(14)),
+        (at(16), at(17)),
+    ]
+
+def test_intersect_intervals_touching_is_empty():
+    assert intersect_intervals([(at(9), at(10))], [(at(10), at(11))]) == []
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from services.working_hours_service import WorkingHoursService
+
+WEEKDAY_HOURS = {
+    day: [{"start": "09:00", "end": "17:00"}]
+    for day in ["monday", "tuesday", "wednesday", "thursday", "friday"]
+}
+
+def make_service(tmp_path, agents=None, default_hours=WEEKDAY_HOURS):
+    profile_path = tmp_path / "agent_profiles.json"
+    profile_path.write_text(json.dumps({
+        "default": {"timezone": "America/Los_Angeles", "working_hours": default_hours},
+        "agents": agents or []
+    }))
+    return WorkingHoursService(profile_file=str(profile_path))
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+def test_spring_forward_week_shifts_utc_hours(tmp_path):
+    service = make_service(tmp_path)
+    # DST starts Sunday 2025-03-09 in Los Angeles: PST (UTC-8) -> PDT (UTC-7)
+    intervals = service.get_working_intervals("AG001", utc(2025, 3, 7, 12), utc(2025, 3, 11, 12))
+    assert intervals == [
+        (utc(2025, 3, 7, 17), utc(2025, 3, 8, 1)),
+        (utc(2025, 3, 10, 16), utc(2025, 3, 11, 0)),
+    ]
+
+def test_fall_back_week_shifts_utc_hours(tmp_path):
+    service = make_service(tmp_path)
+    # DST ends Sunday 2025-11-02 in Los Angeles: PDT (UTC-7) -> PST (UTC-8)
+    intervals = service.get_working_intervals("AG001", utc(2025, 10, 31, 12), utc(2025, 11, 4, 12))
+    assert intervals == [
+        (utc(2025, 10, 31, 16), utc(2025, 11, 1, 0)),
+        (utc(2025, 11, 3, 17), utc(2025, 11, 4, 1)),
+    ]
+
+def test_is_within_working_hours_across_dst(tmp_path):
+    service = make_service(tmp_path)
+    # 9 AM local is 17:00Z before spring-forward and 16:00Z after it
+    assert not service.is_within_working_hours("AG001", utc(2025, 3, 7, 16), utc(2025, 3, 7, 17))
+    assert service.is_within_working_hours("AG001", utc(2025, 3, 10, 16), utc(2025, 3, 10, 17))
+    # A slot running past 5 PM local is not within working hours
+    assert not service.is_within_working_hours("AG001", utc(2025, 3, 10, 23, 30), utc(2025, 3, 11, 0, 30))
+
+def test_overnight_span_runs_into_next_day(tmp_path):
+    service = make_service(tmp_path, agents=[{
+        "agent_id": "AG100",
+        "timezone": "UTC",
+        "working_hours": {"monday": [{"start": "22:00", "end": "06:00"}]}
+    }])
+    # 2025-01-06 is a Monday
+    intervals = service.get_working_intervals("AG100", utc(2025, 1, 6), utc(2025, 1, 8))
+    assert intervals == [(utc(2025, 1, 6, 22), utc(2025, 1, 7, 6))]
+
+def test_empty_span_is_rejected_at_load(tmp_path):
+    with pytest.raises(ValueError, match="empty"):
+        make_service(tmp_path, agents=[{
+            "agent_id": "AG100",
+            "timezone": "UTC",
+            "working_hours": {"monday": [{"start": "09:00", "end": "09:00"}]}
+        }])
+
+def test_mask_extends_beyond_compiled_horizon(tmp_path):
+    service = make_service(tmp_path)
+    start = utc(2025, 1, 6)
+    service.get_working_intervals("AG001", start, start + timedelta(days=1))
+    far = start + timedelta(days=200)
+    assert service.get_working_intervals("AG001", far, far + timedelta(days=1))
+
+def test_far_query_compiles_only_its_own_window(tmp_path):
+    service = make_service(tmp_path)
+    start = utc(2025, 1, 6)
+    service.get_working_intervals("AG001", start, start + timedelta(days=1))
+    far = utc(2200, 1, 6)
+    assert service.get_working_intervals("AG001", far, far + timedelta(days=1))
+    range_start, range_end, intervals, _ = service._masks["AG001"]
+    assert range_start == far
+    assert len(intervals) <= service.horizon_days
+
+def test_unknown_timezone_is_rejected_at_load(tmp_path):
+    with pytest.raises(ValueError, match="Unknown timezone"):
+        make_service(tmp_path, agents=[{
+            "agent_id": "AG100",
+            "timezone": "Mars/Olympus_Mons",
+            "working_hours": WEEKDAY_HOURS
+        }])
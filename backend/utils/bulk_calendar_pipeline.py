@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import random
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+import pytz
+from services.working_hours_service import WorkingHoursService
+from storage.calendar_store import PRODID, CalendarStore, parse_ics_events
+from utils.calendar_mock_generator import EVENT_TYPES
+from utils.ics_writer import serialize_events, write_atomic
+
+DEFAULT_CALENDARS_DIR = Path(__file__).parent.parent / 'data' / 'calendars'
+
+# Recurrences aren't expanded, so importing them would silently turn a series into one event
+RECURRENCE_PROPERTIES = ('RRULE', 'RDATE', 'EXDATE', 'RECURRENCE-ID')
+
+# Worker result: agent id, events, bytes written, events for the store, error, dropped property counts
+TaskResult = Tuple[str, int, int, Optional[List[Dict]], Optional[str], Dict[str, int]]
+
+def _generate_agent_events(agent_id: str,
+                           timezone: str,
+                           weekly_hours: Dict[int, List[Tuple[time, time]]],
+                           start_date: date,
+                           days: int,
+                           max_events_per_day: int,
+                           rng: random.Random) -> List[Dict]:
+    """Generate non-overlapping events inside an agent's local working hours, day by day"""
+    tz = pytz.timezone(timezone)
+    events = []
+    for day_offset in range(days):
+        day = start_date + timedelta(days=day_offset)
+        remaining = rng.randint(0, max_events_per_day)
+        for span_start, span_end in weekly_hours.get(day.weekday(), []):
+            # Work in UTC once the local span is resolved, so DST never skews the arithmetic
+            end_day = day + timedelta(days=1) if span_end < span_start else day
+            window_start = tz.normalize(tz.localize(datetime.combine(day, span_start))).astimezone(pytz.UTC)
+            window_end = tz.normalize(tz.localize(datetime.combine(end_day, span_end))).astimezone(pytz.UTC)
+
+            # Meetings start on a quarter hour after a random gap
+            cursor = window_start + timedelta(minutes=15 * rng.randint(0, 8))
+            while remaining > 0:
+                event_type, duration = rng.choice(EVENT_TYPES)
+                event_end = cursor + timedelta(minutes=duration)
+                if event_end > window_end:
+                    break
+                events.append({
+                    'start': cursor,
+                    'end': event_end,
+                    'summary': event_type,
+                    'description': f"{event_type} for agent {agent_id}",
+                    'uid': str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                })
+                remaining -= 1
+                cursor = event_end + timedelta(minutes=15 * rng.randint(0, 8))
+    return events
+
+def _generate_calendar_task(task: Tuple) -> TaskResult:
+    """Process pool worker: generate, serialize and atomically write one agent calendar"""
+    (agent_id, calendars_dir, timezone, weekly_hours,
+     start_date, days, max_events_per_day, seed, return_events) = task
+    try:
+        # Seed per agent so output does not depend on how agents are spread over workers
+        rng = random.Random(f"{seed}:{agent_id}") if seed is not None else random.Random()
+        events = _generate_agent_events(
+            agent_id, timezone, weekly_hours, start_date, days, max_events_per_day, rng
+        )
+        data = serialize_events(PRODID, events)
+        write_atomic(Path(calendars_dir) / f'{agent_id}.ics', data)
+    except Exception as e:
+        return agent_id, 0, 0, None, f"{type(e).__name__}: {e}", {}
+    return agent_id, len(events), len(data), events if return_events else None, None, {}
+
+def _import_calendar_task(task: Tuple) -> TaskResult:
+    """
+    Process pool worker: parse an external ICS file and write it back normalized to UTC.
+    Calendars with recurring events fail rather than being imported as single events;
+    other properties that can't be kept are counted in the result.
+    """
+    source_path, calendars_dir, return_events = task
+    source_path = Path(source_path)
+    agent_id = source_path.stem
+    dropped_properties = Counter()
+    try:
+        with open(source_path, 'rb') as f:
+            events = parse_ics_events(f.read(), dropped_properties)
+        recurrences = [name for name in RECURRENCE_PROPERTIES if dropped_properties[name]]
+        if recurrences:
+            raise ValueError(f"Recurring events are not supported ({', '.join(recurrences)})")
+        for event in events:
+            # Events without a UID can't be tracked across imports
+            if not event['uid']:
+                event['uid'] = str(uuid.uuid4())
+        data = serialize_events(PRODID, events)
+        write_atomic(Path(calendars_dir) / f'{agent_id}.ics', data)
+    except Exception as e:
+        # Report the failure instead of aborting the whole import
+        return agent_id, 0, 0, None, f"{type(e).__name__}: {e}", {}
+    return agent_id, len(events), len(data), events if return_events else None, None, dict(dropped_properties)
+
+def _run_pipeline(worker: Callable,
+                  tasks: List[Tuple],
+                  store: Optional[CalendarStore],
+                  workers: Optional[int]) -> Dict:
+    """
+    Run calendar tasks across a process pool, populating the store cache as results arrive.
+    A task that fails is counted and listed in the stats without stopping the run, and
+    properties that written calendars couldn't keep are counted per property name.
+    Returns throughput statistics for the run.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = perf_counter()
+    total_events = 0
+    total_bytes = 0
+    failures = []
+    dropped_properties = Counter()
+
+    def handle_result(result):
+        nonlocal total_events, total_bytes
+        agent_id, num_events, num_bytes, events, error, dropped = result
+        if error is not None:
+            failures.append({'agent_id': agent_id, 'error': error})
+            return
+        total_events += num_events
+        total_bytes += num_bytes
+        dropped_properties.update(dropped)
+        if store is not None and events is not None:
+            store.set_events(agent_id, events)
+
+    if workers == 1:
+        for task in tasks:
+            handle_result(worker(task))
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(worker, tasks, chunksize=chunksize):
+                handle_result(result)
+
+    elapsed = perf_counter() - started
+    return {
+        'agents': len(tasks) - len(failures),
+        'failed': len(failures),
+        'failures': failures,
+        'dropped_properties': dict(dropped_properties),
+        'events': total_events,
+        'bytes': total_bytes,
+        'workers': workers,
+        'elapsed_seconds': elapsed,
+        'agents_per_second': len(tasks) / elapsed if elapsed else 0.0,
+        'events_per_second': total_events / elapsed if elapsed else 0.0
+    }
+
+def bulk_generate_calendars(agent_ids: List[str],
+                            store: Optional[CalendarStore] = None,
+                            working_hours: Optional[WorkingHoursService] = None,
+                            days: int = 365,
+                            max_events_per_day: int = 4,
+                            start_date: Optional[date] = None,
+                            seed: Optional[int] = None,
+                            workers: Optional[int] = None) -> Dict:
+    """
+    Generate synthetic calendars for many agents in parallel.
+    Events are placed in each agent's local working hours from their profile.
+    If a store is given, calendars are written to its directory and its cache is populated in the same pass.
+    """
+    calendars_dir = store.calendars_dir if store is not None else DEFAULT_CALENDARS_DIR
+    calendars_dir.mkdir(parents=True, exist_ok=True)
+    working_hours = working_hours or WorkingHoursService()
+    start_date = start_date or date.today()
+    tasks = [
+        (
+            agent_id,
+            str(calendars_dir),
+            working_hours.get_profile(agent_id)['timezone'],
+            working_hours.get_weekly_hours(agent_id),
+            start_date,
+            days,
+            max_events_per_day,
+            seed,
+            store is not None
+        )
+        for agent_id in agent_ids
+    ]
+    return _run_pipeline(_generate_calendar_task, tasks, store, workers)
+
+def bulk_import_calendars(source_dir: str,
+                          store: Optional[CalendarStore] = None,
+                          workers: Optional[int] = None) -> Dict:
+    """
+    Import every <agent_id>.ics file from source_dir in parallel.
+    If a store is given, calendars are written to its directory and its cache is populated in the same pass.
+    """
+    calendars_dir = store.calendars_dir if store is not None else DEFAULT_CALENDARS_DIR
+    calendars_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [
+        (str(source_path), str(calendars_dir), store is not None)
+        for source_path in sorted(Path(source_dir).glob('*.ics'))
+    ]
+    return _run_pipeline(_import_calendar_task, tasks, store, workers)
+
+def _print_report(stats: Dict) -> None:
+    print(
+        f"Wrote {stats['agents']} calendars ({stats['events']} events, {stats['bytes'] / 1e6:.1f} MB) "
+        f"in {stats['elapsed_seconds']:.2f}s with {stats['workers']} workers: "
+        f"{stats['agents_per_second']:.0f} agents/s, {stats['events_per_second']:.0f} events/s"
+    )
+    if stats['dropped_properties']:
+        dropped = ', '.join(
+            f"{name} ({count} events)" for name, count in sorted(stats['dropped_properties'].items())
+        )
+        print(f"Dropped unsupported properties: {dropped}")
+    if stats['failed']:
+        print(f"{stats['failed']} calendars failed:")
+        for failure in stats['failures']:
+            print(f"  {failure['agent_id']}: {failure['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk generate or import agent calendars.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help="Generate synthetic calendars")
+    generate_parser.add_argument('--agents', type=int,
+                                 help="Number of synthetic agents (defaults to the agents in the mock data)")
+    generate_parser.add_argument('--days', type=int, default=365, help="Number of days of events per agent")
+    generate_parser.add_argument('--max-events-per-day', type=int, default=4)
+    generate_parser.add_argument('--seed', type=int, help="Seed for reproducible calendars")
+    generate_parser.add_argument('--workers', type=int, help="Number of worker processes")
+
+    import_parser = subparsers.add_parser('import', help="Import existing ICS files")
+    import_parser.add_argument('source_dir', help="Directory containing <agent_id>.ics files")
+    import_parser.add_argument('--workers', type=int, help="Number of worker processes")
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        if args.agents:
+            agent_ids = [f'AG{i:03d}' for i in range(1, args.agents + 1)]
+        else:
+            mock_data_path = Path(__file__).parent.parent / 'data' / 'mock' / 'agents_clients.json'
+            with open(mock_data_path, 'r') as f:
+                agent_ids = [agent['agent_id'] for agent in json.load(f)['agents']]
+        stats = bulk_generate_calendars(
+            agent_ids,
+            days=args.days,
+            max_events_per_day=args.max_events_per_day,
+            seed=args.seed,
+            workers=args.workers
+        )
+    else:
+        stats = bulk_import_calendars(args.source_dir, workers=args.workers)
+
+    _print_report(stats)
+
+if __name__ == '__main__':
+    main()
@@ -6,28 +6,34 @@ import uuid
 import os
 import random
 from pathlib import Path
+from typing import Optional
+from services.working_hours_service import WorkingHoursService
 
-def generate_mock_calendar(agent_id: str, num_events: int = 10) -> None:
-    """Generate a mock calendar for an agent with random events."""
+# Different types of events and their durations in minutes
+EVENT_TYPES = [
+    ("Client Meeting", 60),
+    ("Property Viewing", 90),
+    ("Team Sync", 30),
+    ("Contract Review", 45),
+    ("Market Analysis", 120),
+    ("Client Follow-up", 30),
+    ("Property Inspection", 120),
+    ("Negotiation Meeting", 60)
+]
+
+def generate_mock_calendar(agent_id: str, num_events: int = 10, timezone: Optional[str] = None) -> None:
+    """Generate a mock calendar for an agent with random events in the agent's local business hours."""
     cal = Calendar()
     cal.add('prodid', '-//HouseWhisper Calendar//')
     cal.add('version', '2.0')
 
-    # Start from tomorrow
-    base_date = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
-    tz = pytz.timezone('UTC')
+    # Events are placed on local wall-clock times, so they line up with the agent's working hours
+    if timezone is None:
+        timezone = WorkingHoursService().get_profile(agent_id)['timezone']
+    tz = pytz.timezone(timezone)
 
-    # Define different types of events and their durations
-    event_types = [
-        ("Client Meeting", 60),
-        ("Property Viewing", 90),
-        ("Team Sync", 30),
-        ("Contract Review", 45),
-        ("Market Analysis", 120),
-        ("Client Follow-up", 30),
-        ("Property Inspection", 120),
-        ("Negotiation Meeting", 60)
-    ]
+    # Start from tomorrow in the agent's timezone
+    base_date = datetime.now(tz).replace(hour=9, minute=0, second=0, microsecond=0, tzinfo=None) + timedelta(days=1)
 
     # Create a list of available days (next 14 days)
     available_days = [base_date + timedelta(days=i) for i in range(14)]
@@ -37,7 +43,7 @@ def generate_mock_calendar(agent_id: str, num_events: int = 10) -> None:
         event = Event()
         
         # Randomly select event type and duration
-        event_type, duration = random.choice(event_types)
+        event_type, duration = random.choice(EVENT_TYPES)
         
         # Randomly select a day
         event_day = random.choice(available_days)
@@ -50,8 +56,8 @@ def generate_mock_calendar(agent_id: str, num_events: int = 10) -> None:
         event_end = event_start + timedelta(minutes=duration)
 
         event.add('summary', f"{event_type}")
-        event.add('dtstart', tz.localize(event_start))
-        event.add('dtend', tz.localize(event_end))
+        event.add('dtstart', tz.normalize(tz.localize(event_start)).astimezone(pytz.UTC))
+        event.add('dtend', tz.normalize(tz.localize(event_end)).astimezone(pytz.UTC))
         event.add('description', f"{event_type} for agent {agent_id}")
         event.add('uid', str(uuid.uuid4()))
 
@@ -73,10 +79,13 @@ def generate_all_calendars():
     with open(mock_data_path, 'r') as f:
         mock_data = json.load(f)
 
+    working_hours = WorkingHoursService()
+
     # Generate calendar for each agent with a random number of events
     for agent in mock_data['agents']:
         num_events = random.randint(8, 15)  # Random number of events per agent
-        generate_mock_calendar(agent['agent_id'], num_events)
+        timezone = working_hours.get_profile(agent['agent_id'])['timezone']
+        generate_mock_calendar(agent['agent_id'], num_events, timezone)
 
 if __name__ == '__main__':
     generate_all_calendars() 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from typing import Optional
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison (RFC 9110),
+    so W/ prefixes, comma-separated lists and * all match as clients expect.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    def opaque_tag(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return opaque_tag(etag) in {opaque_tag(tag) for tag in if_none_match.split(',')}
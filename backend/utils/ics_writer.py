@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import tempfile
+from pathlib import Path
+import pytz
+
+def format_ics_datetime(dt: datetime) -> str:
+    """Format a datetime as an RFC 5545 UTC date-time (e.g. 20250325T131500Z)"""
+    if dt.tzinfo is None:
+        dt = pytz.UTC.localize(dt)
+    return dt.astimezone(pytz.UTC).strftime('%Y%m%dT%H%M%SZ')
+
+def escape_ics_text(text: str) -> str:
+    """Escape a TEXT property value as required by RFC 5545"""
+    return (
+        text.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+def fold_ics_line(line: str) -> str:
+    """Fold a content line so no physical line exceeds 75 octets"""
+    if len(line.encode('utf-8')) <= 75:
+        return line
+
+    parts = []
+    current = ''
+    current_size = 0
+    # Continuation lines start with a space, which counts towards their 75 octets
+    limit = 75
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if current_size + char_size > limit:
+            parts.append(current)
+            current = ''
+            current_size = 0
+            limit = 74
+        current += char
+        current_size += char_size
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+def serialize_events(prodid: str, events: Iterable[Dict], dtstamp: Optional[datetime] = None) -> bytes:
+    """
+    Serialize events straight to an ICS calendar without building icalendar objects.
+    Each event needs 'uid', 'start', 'end' and 'summary', and may have 'description'.
+    Every event gets the same DTSTAMP, which defaults to now.
+    """
+    stamp = format_ics_datetime(dtstamp or datetime.now(pytz.UTC))
+    lines: List[str] = ['BEGIN:VCALENDAR', 'VERSION:2.0', fold_ics_line(f'PRODID:{prodid}')]
+    for event in events:
+        lines.append('BEGIN:VEVENT')
+        lines.append(fold_ics_line(f"SUMMARY:{escape_ics_text(event['summary'])}"))
+        lines.append(f"DTSTAMP:{stamp}")
+        lines.append(f"DTSTART:{format_ics_datetime(event['start'])}")
+        lines.append(f"DTEND:{format_ics_datetime(event['end'])}")
+        lines.append(f"UID:{event['uid']}")
+        if event.get('description'):
+            lines.append(fold_ics_line(f"DESCRIPTION:{escape_ics_text(event['description'])}"))
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file via a temporary file in the same directory and an atomic rename,
+    so readers see either the old file or the complete new one, never a partial write.
+    """
+    path = Path(path)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        # mkstemp creates files readable only by the owner
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def serialize_free_busy(prodid: str,
+                        uid: str,
+                        start: datetime,
+                        end: datetime,
+                        busy: Iterable[Tuple[datetime, datetime]],
+                        dtstamp: datetime) -> bytes:
+    """Serialize busy intervals as an RFC 5545 VFREEBUSY component, without any event details"""
+    lines: List[str] = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        fold_ics_line(f'PRODID:{prodid}'),
+        'METHOD:PUBLISH',
+        'BEGIN:VFREEBUSY',
+        fold_ics_line(f'UID:{uid}'),
+        f'DTSTAMP:{format_ics_datetime(dtstamp)}',
+        f'DTSTART:{format_ics_datetime(start)}',
+        f'DTEND:{format_ics_datetime(end)}'
+    ]
+    for busy_start, busy_end in busy:
+        lines.append(f'FREEBUSY;FBTYPE=BUSY:{format_ics_datetime(busy_start)}/{format_ics_datetime(busy_end)}')
+    lines.extend(['END:VFREEBUSY', 'END:VCALENDAR'])
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
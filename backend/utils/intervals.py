@@ -0,0 +1,72 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals into a sorted, disjoint list."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def find_gaps(busy: List[Interval], start: datetime, end: datetime) -> Iterator[Interval]:
+    """
+    Yield the free intervals of [start, end) not covered by any busy interval.
+    Busy intervals may overlap or nest; the gap after the last one is included.
+    """
+    current = start
+    for busy_start, busy_end in merge_intervals(busy):
+        if busy_end <= current:
+            continue
+        if busy_start >= end:
+            break
+        if busy_start > current:
+            yield (current, busy_start)
+        current = busy_end
+    if current < end:
+        yield (current, end)
+
+def clip_intervals(intervals: List[Interval], start: datetime, end: datetime) -> List[Interval]:
+    """Clip a sorted, disjoint list of intervals to the window [start, end)."""
+    clipped = []
+    for interval_start, interval_end in intervals:
+        if interval_end <= start:
+            continue
+        if interval_start >= end:
+            break
+        clipped.append((max(interval_start, start), min(interval_end, end)))
+    return clipped
+
+def intersect_intervals(first: List[Interval], second: List[Interval]) -> List[Interval]:
+    """Intersect two sorted, disjoint interval lists in a single linear sweep."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def contains_interval(intervals: List[Interval],
+                      starts: List[datetime],
+                      start: datetime,
+                      end: datetime) -> bool:
+    """
+    Check whether [start, end) lies entirely inside one interval of a sorted, disjoint list.
+    `starts` is the precomputed list of interval start times used for the binary search.
+    """
+    index = bisect_right(starts, start) - 1
+    return index >= 0 and intervals[index][1] >= end
@@ -1,18 +1,20 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import json
-from datetime import datetime, timedelta
-import os
-from typing import List, Dict
+from datetime import datetime
+from typing import Dict, Optional
 from pathlib import Path
 import pytz
 from services.availability_service import AvailabilityService
 from services.ai_availability_service import AIAvailabilityService
+from services.working_hours_service import WorkingHoursService
+from services.free_busy_service import FreeBusyService
+from services.change_feed_service import ChangeFeedService, serialize_event
 from storage.calendar_store import CalendarStore
 from utils.calendar_mock_generator import generate_all_calendars
-from models.schemas import TimeRange, TimeSlot
+from utils.http_cache import etag_matches
+from models.schemas import TimeRange
 
 app = FastAPI()
 
@@ -23,12 +25,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Calendar-Epoch", "X-Calendar-Version"],
 )
 
 # Initialize services
 calendar_store = CalendarStore()
-availability_service = AvailabilityService(calendar_store)
-ai_availability_service = AIAvailabilityService(calendar_store)
+working_hours_service = WorkingHoursService()
+availability_service = AvailabilityService(calendar_store, working_hours_service)
+ai_availability_service = AIAvailabilityService(
+    calendar_store,
+    working_hours=working_hours_service,
+    availability_service=availability_service
+)
+free_busy_service = FreeBusyService(calendar_store)
+change_feed_service = ChangeFeedService(calendar_store)
 
 # Load mock data
 data_path = Path(__file__).parent / "data/mock/agents_clients.json"
@@ -45,51 +55,6 @@ def parse_datetime(datetime_str: str) -> datetime:
         dt = pytz.UTC.localize(dt)
     return dt
 
-def make_timezone_aware(dt: datetime) -> datetime:
-    """Ensure a datetime is timezone-aware"""
-    if dt.tzinfo is None:
-        return pytz.UTC.localize(dt)
-    return dt.astimezone(pytz.UTC)
-
-class CalendarService:
-    @staticmethod
-    def load_calendar(agent_id: str) -> List[Dict]:
-        try:
-            calendar_path = Path(__file__).parent / f"data/calendars/{agent_id}.ics"
-            if not os.path.exists(calendar_path):
-                return []
-                
-            from icalendar import Calendar
-            
-            events = []
-            with open(calendar_path, 'rb') as f:
-                cal = Calendar.from_ical(f.read())
-                for component in cal.walk('VEVENT'):
-                    event_start = component.get('dtstart').dt
-                    event_end = component.get('dtend').dt
-                    
-                    # Convert to datetime if date
-                    if not isinstance(event_start, datetime):
-                        event_start = datetime.combine(event_start, datetime.min.time())
-                    if not isinstance(event_end, datetime):
-                        event_end = datetime.combine(event_end, datetime.max.time())
-                    
-                    # Make timezone-aware
-                    event_start = make_timezone_aware(event_start)
-                    event_end = make_timezone_aware(event_end)
-                    
-                    event = {
-                        'summary': str(component.get('summary')),
-                        'description': str(component.get('description', '')),
-                        'start': event_start.isoformat(),
-                        'end': event_end.isoformat()
-                    }
-                    events.append(event)
-            return events
-        except Exception as e:
-            print(f"Error loading calendar for agent {agent_id}: {str(e)}")
-            return []
-
 @app.get("/")
 async def read_root():
     return FileResponse(str(static_path / "index.html"))
@@ -105,12 +70,92 @@ async def get_agents():
         for agent in AGENTS_DATA["agents"]
     ]
 
+def format_sse(event: str, data: Dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def calendar_etag(agent_id: str) -> str:
+    """ETag identifying the current version of an agent's calendar"""
+    return f'"{calendar_store.epoch}-{calendar_store.get_version(agent_id)}"'
+
 @app.get("/api/calendar/{agent_id}")
-async def get_calendar(agent_id: str):
-    events = CalendarService.load_calendar(agent_id)
-    if not events:
+async def get_calendar(request: Request, agent_id: str):
+    if not (calendar_store.calendars_dir / f"{agent_id}.ics").exists():
         return []
-    return events
+
+    etag = calendar_etag(agent_id)
+    headers = {
+        "ETag": etag,
+        "X-Calendar-Epoch": calendar_store.epoch,
+        "X-Calendar-Version": str(calendar_store.get_version(agent_id))
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    events = [serialize_event(event) for event in calendar_store.get_all_events(agent_id)]
+    return JSONResponse(content=events, headers=headers)
+
+@app.get("/api/calendar/{agent_id}/changes")
+async def get_calendar_changes(
+    agent_id: str,
+    since: Optional[int] = Query(None, ge=0, description="Version the client last synced"),
+    epoch: Optional[str] = Query(None, description="Epoch returned with that version"),
+    wait: float = Query(0, ge=0, le=60, description="Seconds to long-poll for a change if nothing changed yet")
+):
+    if not (calendar_store.calendars_dir / f"{agent_id}.ics").exists():
+        raise HTTPException(status_code=404, detail="Agent calendar not found")
+
+    if since is not None and wait and epoch in (None, calendar_store.epoch):
+        await change_feed_service.wait_for_change(agent_id, since, wait)
+    return change_feed_service.get_delta(agent_id, since, epoch)
+
+@app.get("/api/calendar/{agent_id}/subscribe")
+async def subscribe_calendar_changes(
+    request: Request,
+    agent_id: str,
+    since: Optional[int] = Query(None, ge=0, description="Version the client last synced"),
+    epoch: Optional[str] = Query(None, description="Epoch returned with that version")
+):
+    if not (calendar_store.calendars_dir / f"{agent_id}.ics").exists():
+        raise HTTPException(status_code=404, detail="Agent calendar not found")
+
+    async def event_stream():
+        # Start with whatever the client is missing, then push a delta per change
+        delta = change_feed_service.get_delta(agent_id, since, epoch)
+        if delta['reset'] or delta['changes']:
+            yield format_sse("delta", delta)
+        version = delta['version']
+        while not await request.is_disconnected():
+            if not await change_feed_service.wait_for_change(agent_id, version, timeout=15):
+                yield ": keep-alive\n\n"
+                continue
+            delta = change_feed_service.get_delta(agent_id, version, calendar_store.epoch)
+            version = delta['version']
+            yield format_sse("delta", delta)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/freebusy/{agent_id}")
+async def get_free_busy(
+    request: Request,
+    agent_id: str,
+    format: str = Query("json", pattern="^(json|ics)$", description="Response format: json or ics (VFREEBUSY)")
+):
+    if not any(agent["agent_id"] == agent_id for agent in AGENTS_DATA["agents"]):
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    etag = f'"{free_busy_service.get_etag(agent_id)}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if format == "ics":
+        return Response(content=free_busy_service.get_vfreebusy(agent_id), media_type="text/calendar", headers=headers)
+    return JSONResponse(content=free_busy_service.get_free_busy(agent_id), headers=headers)
 
 @app.get("/api/clients/{agent_id}")
 async def get_clients(agent_id: str):
@@ -166,23 +211,89 @@ async def find_available_slots(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_work_block(block: Dict) -> Dict:
+    """Format an AI-recommended work block as a calendar event"""
+    return {
+        "summary": "Schedule Insight",
+        "description": block.get('ai_reasoning', 'Optimal time block for focused work'),
+        "start": block['start'].isoformat(),
+        "end": block['end'].isoformat(),
+        "duration_minutes": block['duration_minutes']
+    }
+
 @app.get("/api/availability/best-block/{agent_id}")
 async def find_best_work_block(
+    request: Request,
     agent_id: str,
     min_duration: int = Query(90, description="Minimum duration in minutes for the work block")
 ):
+    # Clients that accept text/event-stream (e.g. EventSource) get the AI analysis streamed
+    if "text/event-stream" in request.headers.get("accept", ""):
+        try:
+            candidate_blocks, prompt = ai_availability_service.prepare_work_block_analysis(agent_id, min_duration)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if not candidate_blocks:
+            raise HTTPException(status_code=404, detail="No suitable work block found")
+
+        def event_stream():
+            for message in ai_availability_service.stream_best_work_block(candidate_blocks, prompt, agent_id):
+                if message['type'] == 'delta':
+                    yield format_sse("delta", {"content": message['content']})
+                elif message['type'] == 'result':
+                    yield format_sse("result", format_work_block(message['block']))
+                else:
+                    yield format_sse("error", {"detail": message['detail']})
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     try:
         best_block = ai_availability_service.find_best_work_block(agent_id, min_duration)
         if best_block:
-            return {
-                "summary": "Schedule Insight",
-                "description": best_block.get('ai_reasoning', 'Optimal time block for focused work'),
-                "start": best_block['start'].isoformat(),
-                "end": best_block['end'].isoformat(),
-                "duration_minutes": best_block['duration_minutes']
-            }
+            return format_work_block(best_block)
         raise HTTPException(status_code=404, detail="No suitable work block found")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/availability/best-blocks/{agent_id}")
+async def find_best_work_blocks(
+    agent_id: str,
+    min_duration: int = Query(90, description="Minimum duration in minutes for each work block"),
+    k: int = Query(3, ge=1, le=50, description="Number of ranked work blocks to return"),
+    horizon_days: int = Query(7, ge=1, le=90, description="Number of days ahead to search"),
+    step_minutes: int = Query(15, ge=1, le=240, description="Granularity that block start times are aligned to")
+):
+    try:
+        blocks = availability_service.find_best_work_blocks(
+            agent_id,
+            min_duration,
+            k=k,
+            horizon_days=horizon_days,
+            step_minutes=step_minutes
+        )
+        return [
+            {
+                "summary": "Work Block",
+                "description": f"Option {rank} for focused work",
+                "start": block.start.isoformat(),
+                "end": block.end.isoformat(),
+                "duration_minutes": int((block.end - block.start).total_seconds() / 60)
+            }
+            for rank, block in enumerate(blocks, start=1)
+        ]
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
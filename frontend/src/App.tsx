@@ -1,13 +1,37 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Typography, Skeleton, Paper } from '@mui/material';
 import Calendar from './components/Calendar';
 import ClientList from './components/ClientList';
 import TimeRangeInput from './components/TimeRangeInput';
 import AgentSelector from './components/AgentSelector';
 import { api } from './services/api';
-import { Agent, Client, CalendarEvent } from './types';
+import { Agent, Client, CalendarEvent, CalendarDelta } from './types';
 import './App.css';
 
+// Last synced calendar state per agent, so switching back only fetches what changed
+interface CalendarSync {
+  epoch: string;
+  version: number;
+  events: CalendarEvent[];
+  bestWorkBlock: CalendarEvent | null;
+  workBlockOptions: CalendarEvent[] | null;
+}
+
+const applyCalendarDelta = (events: CalendarEvent[], delta: CalendarDelta): CalendarEvent[] => {
+  if (delta.reset) {
+    return delta.events ?? [];
+  }
+  const eventsByUid = new Map(events.map((event) => [event.uid, event]));
+  for (const change of delta.changes ?? []) {
+    if (change.type === 'removed' || !change.event) {
+      eventsByUid.delete(change.uid);
+    } else {
+      eventsByUid.set(change.uid, change.event);
+    }
+  }
+  return Array.from(eventsByUid.values());
+};
+
 function App() {
   const [selectedAgent, setSelectedAgent] = useState<Agent | null>(null);
   const [agents, setAgents] = useState<Agent[]>([]);
@@ -16,6 +40,9 @@ function App() {
   const [loading, setLoading] = useState(true);
   const [bestWorkBlock, setBestWorkBlock] = useState<CalendarEvent | null>(null);
   const [loadingInsight, setLoadingInsight] = useState(false);
+  const [insightText, setInsightText] = useState('');
+  const [workBlockOptions, setWorkBlockOptions] = useState<CalendarEvent[]>([]);
+  const calendarSyncs = useRef<Record<string, CalendarSync>>({});
 
   useEffect(() => {
     const loadAgents = async () => {
@@ -32,34 +59,123 @@ function App() {
   }, []);
 
   useEffect(() => {
+    if (!selectedAgent) {
+      setClients([]);
+      setEvents([]);
+      setBestWorkBlock(null);
+      setInsightText('');
+      setWorkBlockOptions([]);
+      return;
+    }
+
+    const agentId = selectedAgent.agent_id;
+    let cancelled = false;
+    let closeStream: (() => void) | null = null;
+
+    // Fetch the ranked work block options and stream the AI analysis of the best one,
+    // so the analysis text shows up as soon as it is generated
+    const refreshWorkBlocks = () => {
+      setWorkBlockOptions([]);
+      api.findBestWorkBlocks(agentId, 90, 3)
+        .then((options) => {
+          const sync = calendarSyncs.current[agentId];
+          if (sync) {
+            sync.workBlockOptions = options;
+          }
+          if (!cancelled) {
+            setWorkBlockOptions(options);
+          }
+        })
+        .catch((error) => console.error('Error loading work block options:', error));
+
+      closeStream?.();
+      setLoadingInsight(true);
+      setBestWorkBlock(null);
+      setInsightText('');
+      closeStream = api.streamBestWorkBlock(
+        agentId,
+        90,
+        (content) => setInsightText((text) => text + content),
+        (workBlock) => {
+          const sync = calendarSyncs.current[agentId];
+          if (sync) {
+            sync.bestWorkBlock = workBlock;
+          }
+          setBestWorkBlock(workBlock);
+          setLoadingInsight(false);
+        },
+        (message) => {
+          console.error('Error streaming work block analysis:', message);
+          setLoadingInsight(false);
+        }
+      );
+    };
+
+    // Fetch the changes since the last sync; returns whether the calendar version moved
+    const syncCalendar = async (waitSeconds: number): Promise<boolean> => {
+      const previous = calendarSyncs.current[agentId];
+      const delta = await api.getCalendarChanges(agentId, previous?.version, previous?.epoch, waitSeconds);
+      if (cancelled) {
+        return false;
+      }
+      const changed = !previous || delta.epoch !== previous.epoch || delta.version !== previous.version;
+      if (changed) {
+        calendarSyncs.current[agentId] = {
+          epoch: delta.epoch,
+          version: delta.version,
+          events: applyCalendarDelta(previous?.events ?? [], delta),
+          bestWorkBlock: null,
+          workBlockOptions: null
+        };
+      }
+      setEvents(calendarSyncs.current[agentId].events);
+      return changed;
+    };
+
     const loadAgentData = async () => {
-      if (selectedAgent) {
+      try {
+        const [clientData, changed] = await Promise.all([
+          api.getClients(agentId),
+          syncCalendar(0)
+        ]);
+        if (cancelled) {
+          return;
+        }
+        setClients(clientData);
+
+        // Only recompute the work blocks if the calendar changed since they were computed
+        const { bestWorkBlock: cachedBlock, workBlockOptions: cachedOptions } = calendarSyncs.current[agentId];
+        if (changed || !cachedBlock || !cachedOptions) {
+          refreshWorkBlocks();
+        } else {
+          setBestWorkBlock(cachedBlock);
+          setWorkBlockOptions(cachedOptions);
+          setInsightText('');
+          setLoadingInsight(false);
+        }
+      } catch (error) {
+        console.error('Error loading agent data:', error);
+        return;
+      }
+
+      // Long-poll for further changes while this agent is selected
+      while (!cancelled) {
         try {
-          setLoadingInsight(true);
-          setBestWorkBlock(null);
-          
-          const [clientData, calendarData] = await Promise.all([
-            api.getClients(selectedAgent.agent_id),
-            api.getCalendar(selectedAgent.agent_id)
-          ]);
-          setClients(clientData);
-          setEvents(calendarData);
-          
-          // Load best work block
-          const workBlock = await api.findBestWorkBlock(selectedAgent.agent_id, 90);
-          setBestWorkBlock(workBlock);
+          if (await syncCalendar(25)) {
+            refreshWorkBlocks();
+          }
         } catch (error) {
-          console.error('Error loading agent data:', error);
-        } finally {
-          setLoadingInsight(false);
+          console.error('Error syncing calendar changes:', error);
+          await new Promise((resolve) => setTimeout(resolve, 5000));
         }
-      } else {
-        setClients([]);
-        setEvents([]);
-        setBestWorkBlock(null);
       }
     };
     loadAgentData();
+
+    return () => {
+      cancelled = true;
+      closeStream?.();
+    };
   }, [selectedAgent]);
 
   const formatDateTime = (dateTime: string) => {
@@ -87,8 +203,14 @@ function App() {
           </div>
           <div className="analysis">
             <span className="label">Analysis:</span>
-            <Skeleton variant="text" width="100%" />
-            <Skeleton variant="text" width="80%" />
+            {insightText ? (
+              <span className="value">{insightText}</span>
+            ) : (
+              <>
+                <Skeleton variant="text" width="100%" />
+                <Skeleton variant="text" width="80%" />
+              </>
+            )}
           </div>
         </div>
       );
@@ -128,6 +250,18 @@ function App() {
           <span className="label">Analysis:</span>
           <span className="value">{bestWorkBlock.description}</span>
         </div>
+        {workBlockOptions.length > 0 && (
+          <div className="work-block-options">
+            <span className="label">Options:</span>
+            <ol className="value">
+              {workBlockOptions.map((option) => (
+                <li key={option.start}>
+                  {formatDateTime(option.start)} - {formatDateTime(option.end)} ({option.duration_minutes} minutes)
+                </li>
+              ))}
+            </ol>
+          </div>
+        )}
       </div>
     );
   };
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Agent, Client, CalendarEvent } from '../types';
+import { Agent, Client, CalendarEvent, CalendarDelta } from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
 
@@ -20,6 +20,17 @@ export const api = {
         return response.data;
     },
 
+    getCalendarChanges: async (agentId: string, since?: number, epoch?: string, waitSeconds: number = 0): Promise<CalendarDelta> => {
+        const response = await axios.get(`${API_BASE_URL}/calendar/${agentId}/changes`, {
+            params: {
+                since,
+                epoch,
+                wait: waitSeconds
+            }
+        });
+        return response.data;
+    },
+
     getClients: async (agentId: string): Promise<Client[]> => {
         const response = await axios.get(`${API_BASE_URL}/clients/${agentId}`);
         return response.data;
@@ -51,5 +62,41 @@ export const api = {
             }
         });
         return response.data;
+    },
+
+    streamBestWorkBlock: (
+        agentId: string,
+        minDurationMinutes: number,
+        onDelta: (content: string) => void,
+        onResult: (block: CalendarEvent) => void,
+        onError: (message: string) => void
+    ): (() => void) => {
+        // EventSource sends Accept: text/event-stream, so the backend streams the AI analysis
+        const source = new EventSource(
+            `${API_BASE_URL}/availability/best-block/${agentId}?min_duration=${minDurationMinutes}`
+        );
+        source.addEventListener('delta', (event) => {
+            onDelta(JSON.parse((event as MessageEvent).data).content);
+        });
+        source.addEventListener('result', (event) => {
+            onResult(JSON.parse((event as MessageEvent).data));
+            source.close();
+        });
+        source.addEventListener('error', (event) => {
+            const data = (event as MessageEvent).data;
+            onError(data ? JSON.parse(data).detail : 'Failed to stream work block analysis');
+            source.close();
+        });
+        return () => source.close();
+    },
+
+    findBestWorkBlocks: async (agentId: string, minDurationMinutes: number, k: number = 3): Promise<CalendarEvent[]> => {
+        const response = await axios.get(`${API_BASE_URL}/availability/best-blocks/${agentId}`, {
+            params: {
+                min_duration: minDurationMinutes,
+                k
+            }
+        });
+        return response.data;
     }
 };
@@ -17,9 +17,26 @@ export interface Client {
 }
 
 export interface CalendarEvent {
+    uid?: string;
     summary: string;
     description: string;
     start: string;
     end: string;
     duration_minutes?: number;
 }
+
+export interface CalendarChange {
+    version: number;
+    type: 'added' | 'removed' | 'modified';
+    uid: string;
+    event: CalendarEvent | null;
+}
+
+export interface CalendarDelta {
+    agent_id: string;
+    epoch: string;
+    version: number;
+    reset: boolean;
+    events?: CalendarEvent[];
+    changes?: CalendarChange[];
+}
\ No newline at end of file